@@ -1,4 +1,3 @@
-import json
 import sys
 import os
 import re
@@ -9,7 +8,7 @@ from datetime import datetime
 BASE_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(BASE_DIR / "src"))
 
-from agents.cv_analyzer import CVAnalyzer
+from agents.cv_analyzer import get_analyzer
 
 # Optional DB imports
 try:
@@ -19,9 +18,29 @@ try:
 except Exception:
     DB_AVAILABLE = False
 from utils.guards import safe_extract_pdf_text
+from utils.json_io import load_json, dump_json
 
 DATA_DIR = BASE_DIR / "src" / "data"
 
+# Adresses email dans le texte du CV, et domaines d'email perso à privilégier
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PREF_RE = re.compile(r"@(?:gmail\.com|outlook\.com|hotmail\.com|yahoo\.|icloud\.com)", re.IGNORECASE)
+
+# Caractères autorisés dans un nom de fichier de CV; les autres deviennent des espaces
+_ALLOWED = frozenset("-_. ()abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+
+
+class _FilenameTable(dict):
+    """Table pour str.translate, complétée à la demande (couvre aussi l'Unicode)"""
+
+    def __missing__(self, code):
+        value = code if chr(code) in _ALLOWED else ' '
+        self[code] = value
+        return value
+
+
+_FILENAME_TABLE = _FilenameTable()
+
 def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
     """
     Sauvegarde un CV uploadé et l'analyse
@@ -33,20 +52,22 @@ def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
         # Créer le dossier data s'il n'existe pas
         DATA_DIR.mkdir(parents=True, exist_ok=True)
         
+        # Horodatage unique pour tout l'upload (fichiers et cv_data.json)
+        ts_now = datetime.now()
+        stamp = ts_now.strftime('%Y%m%d_%H%M%S')
+
         # Sauvegarder d'abord vers un fichier temporaire
-        tmp_filename = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        tmp_filename = f"upload_{stamp}.pdf"
         tmp_path = DATA_DIR / tmp_filename
         
         with open(tmp_path, 'wb') as f:
             f.write(uploaded_file.getbuffer())
         
-        # Charger les données existantes pour initialiser CVAnalyzer
+        # Charger les données existantes (lues une seule fois; inutile si la DB est utilisée)
         cv_data_path = DATA_DIR / "cv_data.json"
-        if cv_data_path.exists():
-            with open(cv_data_path, 'r', encoding='utf-8') as f:
-                existing_cv_data = json.load(f)
-        else:
-            existing_cv_data = []
+        cv_data = None
+        if not DB_AVAILABLE:
+            cv_data = load_json(cv_data_path) if cv_data_path.exists() else []
         
         # Créer une entrée temporaire pour l'analyse
         temp_cv_entry = {
@@ -55,9 +76,8 @@ def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
             'path': str(tmp_path)
         }
         
-        # Analyser le CV avec CVAnalyzer
-        analyzer = CVAnalyzer([temp_cv_entry])
-        analyzer.analyze_cvs()  # Cette méthode ajoute 'analysis' à temp_cv_entry
+        # Analyser le CV avec le CVAnalyzer partagé (modèle spaCy déjà chargé)
+        get_analyzer().analyze_entry(temp_cv_entry)  # Ajoute 'analysis' à temp_cv_entry
         
         # Vérifier que l'analyse a réussi
         if 'analysis' not in temp_cv_entry or 'skills' not in temp_cv_entry['analysis']:
@@ -87,13 +107,8 @@ def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
 
         # Déterminer le nom de fichier final: "cv - <Nom>.pdf"
         def _sanitize_filename_part(s: str) -> str:
-            s = s.strip()
-            # Remplacer les barres et caractères interdits
-            keep = "-_. ()abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-            s = ''.join(ch if ch in keep else ' ' for ch in s)
-            # Réduire les espaces multiples
-            s = ' '.join(s.split())
-            return s
+            # Remplacer les barres et caractères interdits, puis réduire les espaces multiples
+            return ' '.join(s.translate(_FILENAME_TABLE).split())
 
         safe_name = _sanitize_filename_part(extracted_name)
         final_filename = f"cv - {safe_name}.pdf"
@@ -104,30 +119,30 @@ def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
             os.replace(tmp_path, final_path)
         except Exception:
             # Si remplacement échoue, ajouter timestamp pour éviter collision
-            final_filename = f"cv - {safe_name} {datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            final_filename = f"cv - {safe_name} {stamp}.pdf"
             final_path = DATA_DIR / final_filename
             os.replace(tmp_path, final_path)
 
         # Extraire email depuis le PDF
         def _extract_email_from_pdf(pdf_path: Path) -> str:
             try:
-                text = safe_extract_pdf_text(str(pdf_path), fallback_text="")
-                if not text:
-                    return None
-                # Chercher les emails plausibles
-                emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
+                # L'email est presque toujours en première page: ne lire tout
+                # le PDF que s'il n'y est pas
+                text = safe_extract_pdf_text(str(pdf_path), fallback_text="", pages=(0,))
+                emails = _EMAIL_RE.findall(text) if text else []
+                if not emails:
+                    text = safe_extract_pdf_text(str(pdf_path), fallback_text="")
+                    emails = _EMAIL_RE.findall(text) if text else []
                 if not emails:
                     return None
                 # Heuristique: privilégier les domaines courants d'email perso
-                preferred = [e for e in emails if any(d in e.lower() for d in ["gmail.com","outlook.com","hotmail.com","yahoo.","icloud.com"]) ]
-                return (preferred[0] if preferred else emails[0]).strip()
+                return next((e for e in emails if _PREF_RE.search(e)), emails[0]).strip()
             except Exception:
                 return None
 
         extracted_email = _extract_email_from_pdf(final_path) or user_email
         
         # Mettre à jour en DB si disponible, sinon cv_data.json
-        cv_data_path = DATA_DIR / "cv_data.json"
         if DB_AVAILABLE:
             session = get_session()
             try:
@@ -167,38 +182,34 @@ def save_and_analyze_cv(uploaded_file, user_name: str, user_email: str):
             _write_json_fallback = True
 
         if '_write_json_fallback' in locals() and _write_json_fallback:
-            # Charger les données existantes
-            if cv_data_path.exists():
-                with open(cv_data_path, 'r', encoding='utf-8') as f:
-                    cv_data = json.load(f)
-            else:
-                cv_data = []
-            # Chercher si l'utilisateur existe déjà
-            user_found = False
+            # Charger les données existantes si ce n'est pas déjà fait (échec de la DB)
+            if cv_data is None:
+                cv_data = load_json(cv_data_path) if cv_data_path.exists() else []
+            # Chercher si l'utilisateur existe déjà (index nom -> première position)
+            idx = {}
             for i, user in enumerate(cv_data):
-                if user.get('name') == user_name or user.get('name') == extracted_name:
-                    # Mettre à jour
-                    cv_data[i] = {
-                        "name": extracted_name,
-                        "path": str(final_path.relative_to(BASE_DIR)),
-                        "email": extracted_email,
-                        "analysis": analysis,
-                        "updated_at": datetime.now().isoformat()
-                    }
-                    user_found = True
-                    break
+                idx.setdefault(user.get('name'), i)
+            hits = [idx[n] for n in (user_name, extracted_name) if n in idx]
+            if hits:
+                # Mettre à jour
+                cv_data[min(hits)] = {
+                    "name": extracted_name,
+                    "path": str(final_path.relative_to(BASE_DIR)),
+                    "email": extracted_email,
+                    "analysis": analysis,
+                    "updated_at": ts_now.isoformat()
+                }
             # Si l'utilisateur n'existe pas, l'ajouter
-            if not user_found:
+            else:
                 cv_data.append({
                     "name": extracted_name,
                     "path": str(final_path.relative_to(BASE_DIR)),
                     "email": extracted_email,
                     "analysis": analysis,
-                    "created_at": datetime.now().isoformat()
+                    "created_at": ts_now.isoformat()
                 })
             # Sauvegarder
-            with open(cv_data_path, 'w', encoding='utf-8') as f:
-                json.dump(cv_data, f, indent=2, ensure_ascii=False)
+            dump_json(cv_data, cv_data_path)
         
         skills = analysis.get('skills', [])
         return True, f"CV analysé avec succès ! {len(skills)} compétences détectées.", skills, extracted_name, extracted_email
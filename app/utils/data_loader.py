@@ -1,52 +1,181 @@
-import json
+import math
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Callable, FrozenSet, List, Dict, NamedTuple, Optional, Tuple
 from datetime import datetime
 
+import msgspec
+import streamlit as st
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Optional DB imports (fallback to JSON if DB unavailable)
 try:
     from db.session import get_session
     from db.models import User, CV, Preference, JobOffer, Notification
+    from sqlalchemy import func, select
     DB_AVAILABLE = True
 except Exception:
     DB_AVAILABLE = False
 
 # Chemins vers les fichiers de données
 BASE_DIR = Path(__file__).parent.parent.parent
+if str(BASE_DIR / "src") not in sys.path:
+    sys.path.insert(0, str(BASE_DIR / "src"))
+from utils.json_io import load_json
+from notification_logger import NOTIFICATION_LOG_FILE, read_notification_log
+
 DATA_DIR = BASE_DIR / "src" / "data"
+CV_FILE = DATA_DIR / "cv_data.json"
+JOB_OFFERS_FILE = DATA_DIR / "job_offers.json"
+
+# Taille des lots lus en streaming depuis la DB
+DB_YIELD_PER = 500
+
+# Durée de vie du cache Streamlit (secondes) pour les chargements de données
+CACHE_TTL = 60
+
+
+def _file_mtime(path: Path) -> Optional[float]:
+    """Date de modification d'un fichier (clé de cache), None s'il n'existe pas"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# Mots-clés utilisés pour inférer les compétences d'une offre sans liste de skills
+SKILL_KEYWORDS = (
+    'python','r','java','javascript','typescript','sql','scala','pandas','numpy','scikit-learn','sklearn',
+    'tensorflow','pytorch','spark','hadoop','tableau','power bi','excel','machine learning','deep learning',
+    'data visualization','visualisation','dataviz','statistical analysis','analyse statistique','data mining',
+    'data analysis','aws','azure','gcp','docker','git','api','etl','airflow','dbt','fastapi','django','flask',
+    'kubernetes','terraform','ansible','linux','redis','postgres','mysql','mongodb'
+)
+
+# Automate compilé une fois: un seul passage sur le texte pour tous les mots-clés
+if ahocorasick:
+    _SKILL_AC = ahocorasick.Automaton()
+    for _kw in SKILL_KEYWORDS:
+        _SKILL_AC.add_word(_kw, _kw)
+    _SKILL_AC.make_automaton()
+else:
+    # Repli: une regex en lookahead (le mot-clé le plus long à chaque position);
+    # les mots-clés contenus dans une correspondance ('java' dans 'javascript')
+    # sont ajoutés via _SKILL_SUBWORDS
+    _SKILL_RE = re.compile('(?=(' + '|'.join(map(re.escape, sorted(SKILL_KEYWORDS, key=len, reverse=True))) + '))')
+    _SKILL_SUBWORDS = {kw: {k for k in SKILL_KEYWORDS if k in kw} for kw in SKILL_KEYWORDS}
+
+def infer_skills_from_text(title: str, description: str) -> List[str]:
+    """Extraction simple de compétences depuis le titre + la description d'une offre"""
+    text = f"{title} {description}".lower()
+    if ahocorasick:
+        return list({kw for _, kw in _SKILL_AC.iter(text)})
+    return list(set().union(*(_SKILL_SUBWORDS[m] for m in set(_SKILL_RE.findall(text)))))
+
+class JobOfferRec(msgspec.Struct, forbid_unknown_fields=True):
+    """Offre telle qu'enregistrée dans job_offers.json (champs Adzuna + analyse)"""
+    title: str = ''
+    company: str = ''
+    location: Optional[str] = None
+    description: Optional[str] = ''
+    url: Optional[str] = ''
+    source: Optional[str] = ''
+    created: Optional[str] = ''
+    salary_min: Optional[float] = None
+    salary_max: Optional[float] = None
+    contract_type: Optional[str] = None
+    requirements: Dict[str, Any] = {}
+    skills: List[str] = []
+
+    def to_dict(self) -> Dict:
+        return msgspec.structs.asdict(self)
+
+_JOB_OFFERS_DECODER = msgspec.json.Decoder(List[JobOfferRec])
+
+def _decode_job_offers(path: Path) -> List[Dict]:
+    """Décode job_offers.json en structures typées, puis en dicts pour le reste de l'app.
+
+    Si le fichier ne correspond pas au schéma (champ inconnu ou mal typé),
+    il est relu tel quel pour ne perdre aucune donnée.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        return [rec.to_dict() for rec in _JOB_OFFERS_DECODER.decode(data)]
+    except msgspec.ValidationError:
+        return load_json(path)
+
+# Fichiers JSON déjà parsés: chemin -> (st_mtime_ns, données)
+_CACHE: Dict[str, Tuple[int, Any]] = {}
+
+def _cached_json(path: Path, loader: Callable[[Path], Any] = load_json) -> Any:
+    """Charge un fichier JSON, en réutilisant le résultat tant que le fichier n'a pas changé"""
+    key = str(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    hit = _CACHE.get(key)
+    if hit and hit[0] == mtime_ns:
+        return hit[1]
+    data = loader(path)
+    _CACHE[key] = (mtime_ns, data)
+    return data
 
 def load_cv_data() -> List[Dict]:
-    """Charge les données des CVs (DB si dispo, sinon JSON)"""
+    """Charge les données des CVs (DB si dispo, sinon JSON).
+
+    Le résultat est mis en cache; la date de modification de cv_data.json
+    fait partie de la clé pour invalider le cache après une modification.
+    """
+    return _load_cv_data(_file_mtime(CV_FILE))
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _load_cv_data(mtime: Optional[float]) -> List[Dict]:
     if DB_AVAILABLE:
         try:
             session = get_session()
-            rows = (
-                session.query(CV, User)
+            stmt = (
+                select(User.name, User.email, CV.file_path, CV.analysis, CV.updated_at, CV.created_at)
+                .select_from(CV)
                 .join(User, CV.user_id == User.id)
-                .all()
+                .execution_options(yield_per=DB_YIELD_PER)
             )
             result = []
-            for cv, user in rows:
+            for r in session.execute(stmt).mappings():
                 result.append({
-                    'name': user.name,
-                    'email': user.email,
-                    'path': cv.file_path,
-                    'analysis': cv.analysis or {},
-                    'updated_at': getattr(cv, 'updated_at', None).isoformat() if getattr(cv, 'updated_at', None) else None,
-                    'created_at': getattr(cv, 'created_at', None).isoformat() if getattr(cv, 'created_at', None) else None,
+                    'name': r['name'],
+                    'email': r['email'],
+                    'path': r['file_path'],
+                    'analysis': r['analysis'] or {},
+                    'updated_at': r['updated_at'].isoformat() if r['updated_at'] else None,
+                    'created_at': r['created_at'].isoformat() if r['created_at'] else None,
                 })
             session.close()
             return result
         except Exception:
             pass
-    cv_file = DATA_DIR / "cv_data.json"
-    if cv_file.exists():
-        with open(cv_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    if CV_FILE.exists():
+        return _cached_json(CV_FILE)
     return []
 
+def load_cv_by_name_index() -> Dict[str, Dict]:
+    """Index nom -> CV (premier CV trouvé pour chaque nom), mis en cache"""
+    return _load_cv_by_name_index(_file_mtime(CV_FILE))
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _load_cv_by_name_index(mtime: Optional[float]) -> Dict[str, Dict]:
+    return {cv.get('name'): cv for cv in reversed(load_cv_data()) if cv.get('name')}
+
 def load_job_offers() -> List[Dict]:
-    """Charge les offres d'emploi (DB si dispo, sinon JSON)"""
+    """Charge les offres d'emploi (DB si dispo, sinon JSON), avec cache"""
+    return _load_job_offers(_file_mtime(JOB_OFFERS_FILE))
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _load_job_offers(mtime: Optional[float]) -> List[Dict]:
     if DB_AVAILABLE:
         try:
             session = get_session()
@@ -67,10 +196,8 @@ def load_job_offers() -> List[Dict]:
             return result
         except Exception:
             pass
-    job_file = DATA_DIR / "job_offers.json"
-    if job_file.exists():
-        with open(job_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    if JOB_OFFERS_FILE.exists():
+        return _cached_json(JOB_OFFERS_FILE, _decode_job_offers)
     return []
 
 def load_user_preferences() -> List[Dict]:
@@ -78,21 +205,25 @@ def load_user_preferences() -> List[Dict]:
     if DB_AVAILABLE:
         try:
             session = get_session()
-            rows = (
-                session.query(Preference, User)
+            stmt = (
+                select(
+                    User.name, User.email, Preference.keywords, Preference.location,
+                    Preference.contract_types, Preference.min_match_score, Preference.notify_via_email,
+                )
+                .select_from(Preference)
                 .join(User, Preference.user_id == User.id)
-                .all()
+                .execution_options(yield_per=DB_YIELD_PER)
             )
             result = []
-            for pref, user in rows:
+            for r in session.execute(stmt).mappings():
                 result.append({
-                    'name': user.name,
-                    'email': user.email,
-                    'preferred_jobs': pref.keywords or [],
-                    'location': pref.location or '',
-                    'contract_types': pref.contract_types or [],
-                    'min_match_score': pref.min_match_score,
-                    'notify_via_email': pref.notify_via_email,
+                    'name': r['name'],
+                    'email': r['email'],
+                    'preferred_jobs': r['keywords'] or [],
+                    'location': r['location'] or '',
+                    'contract_types': r['contract_types'] or [],
+                    'min_match_score': r['min_match_score'],
+                    'notify_via_email': r['notify_via_email'],
                 })
             session.close()
             return result
@@ -100,98 +231,163 @@ def load_user_preferences() -> List[Dict]:
             pass
     pref_file = DATA_DIR / "user_preferences.json"
     if pref_file.exists():
-        with open(pref_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _cached_json(pref_file)
     return []
 
 def get_user_by_name(name: str) -> Optional[Dict]:
-    """Récupère un utilisateur par son nom"""
-    users = load_user_preferences()
-    for user in users:
-        if user.get('name', '').lower() == name.lower():
-            # Trouver les données CV correspondantes
-            cv_data_list = load_cv_data()
-            for cv in cv_data_list:
-                if cv.get('name', '').lower() == name.lower():
-                    user['cv_analysis'] = cv.get('analysis', {})
-                    user['cv_path'] = cv.get('path', '')
-                    break
-            return user
-    return None
-
-def get_matching_jobs(user_skills: List[str], min_match_percentage: int = 50) -> List[Dict]:
-    """Trouve les offres correspondant aux compétences de l'utilisateur"""
-    jobs = load_job_offers()
-    matched_jobs = []
-    
-    # Fonction simple d'extraction de compétences si non fournies
-    def infer_skills_from_text(title: str, description: str) -> List[str]:
-        text = f"{title} {description}".lower()
-        keywords = {
-            'python','r','java','javascript','typescript','sql','scala','pandas','numpy','scikit-learn','sklearn',
-            'tensorflow','pytorch','spark','hadoop','tableau','power bi','excel','machine learning','deep learning',
-            'data visualization','visualisation','dataviz','statistical analysis','analyse statistique','data mining',
-            'data analysis','aws','azure','gcp','docker','git','api','etl','airflow','dbt','fastapi','django','flask',
-            'kubernetes','terraform','ansible','linux','redis','postgres','mysql','mongodb'
-        }
-        detected = set()
-        for kw in keywords:
-            if kw in text:
-                detected.add(kw)
-        return list(detected)
-    
+    """Récupère un utilisateur par son nom (insensible à la casse)"""
+    key = name.lower()
+    # Index nom -> entrée (la première entrée l'emporte en cas de doublon)
+    users = {u.get('name', '').lower(): u for u in reversed(load_user_preferences())}
+    user = users.get(key)
+    if user is None:
+        return None
+    user = dict(user)  # ne pas modifier la liste mise en cache
+    # Trouver les données CV correspondantes
+    cvs = {cv.get('name', '').lower(): cv for cv in reversed(load_cv_data())}
+    cv = cvs.get(key)
+    if cv is not None:
+        user['cv_analysis'] = cv.get('analysis', {})
+        user['cv_path'] = cv.get('path', '')
+    return user
+
+class JobIndex(NamedTuple):
+    """Offres en colonnes (listes parallèles) pour la boucle de matching"""
+    titles: List[str]
+    companies: List[str]
+    urls: List[str]
+    descriptions: List[str]
+    skill_sets: List[FrozenSet[str]]
+    records: List[Dict]
+
+def build_job_index(jobs: List[Dict]) -> JobIndex:
+    """Construit l'index des offres (compétences normalisées une seule fois)"""
+    titles, companies, urls, descriptions, skill_sets = [], [], [], [], []
     for job in jobs:
+        title = job.get('title', '')
+        description = job.get('description', '')
         job_skills = [s.lower() for s in job.get('skills', [])]
         if not job_skills:
             # Essayer d'inférer depuis le titre + description
-            job_skills = infer_skills_from_text(job.get('title',''), job.get('description',''))
-        user_skills_lower = [s.lower() for s in user_skills]
-        
+            job_skills = infer_skills_from_text(title, description)
+        titles.append(title)
+        companies.append(job.get('company', ''))
+        urls.append(job.get('url', ''))
+        descriptions.append(description)
+        skill_sets.append(frozenset(job_skills))
+    return JobIndex(titles, companies, urls, descriptions, skill_sets, jobs)
+
+def load_job_index() -> JobIndex:
+    """Index des offres chargées par load_job_offers(), partagé entre les sessions"""
+    return _load_job_index(_file_mtime(JOB_OFFERS_FILE))
+
+@st.cache_resource(ttl=CACHE_TTL, show_spinner=False)
+def _load_job_index(mtime: Optional[float]) -> JobIndex:
+    return build_job_index(load_job_offers())
+
+def get_matching_jobs(user_skills: List[str], min_match_percentage: int = 50, jobs: Optional[List[Dict]] = None, index: Optional[JobIndex] = None) -> List[Dict]:
+    """Trouve les offres correspondant aux compétences de l'utilisateur.
+
+    `index` (ou `jobs`) permet de passer des offres déjà chargées, sinon
+    l'index partagé de load_job_index() est utilisé. Les offres retournées
+    sont des copies annotées; l'index n'est pas modifié.
+    """
+    if index is None:
+        index = build_job_index(jobs) if jobs is not None else load_job_index()
+    matched_jobs = []
+    
+    user_skills_lower = frozenset(s.lower() for s in user_skills)
+    n_user = len(user_skills_lower)
+
+    for i, job_set in enumerate(index.skill_sets):
         # Calculer le pourcentage de match
-        if job_skills:
-            matches = sum(1 for skill in job_skills if skill in user_skills_lower)
-            match_percentage = (matches / len(job_skills)) * 100
+        if job_set:
+            # Seuil impossible à atteindre avec les compétences de l'utilisateur:
+            # offre écartée sans calculer l'intersection
+            need = math.ceil(len(job_set) * min_match_percentage / 100)
+            if need > n_user:
+                continue
+            matches = len(job_set & user_skills_lower)
+            match_percentage = (matches / len(job_set)) * 100
             
             if match_percentage >= min_match_percentage:
-                job['match_percentage'] = round(match_percentage)
-                job['matched_skills'] = matches
-                job['total_skills'] = len(job_skills)
-                job['missing_skills'] = [s for s in job_skills if s not in user_skills_lower]
-                matched_jobs.append(job)
+                matched_jobs.append(dict(
+                    index.records[i],
+                    match_percentage=round(match_percentage),
+                    matched_skills=matches,
+                    total_skills=len(job_set),
+                    missing_skills=sorted(job_set - user_skills_lower),
+                ))
     
     # Trier par pourcentage de match décroissant
     matched_jobs.sort(key=lambda x: x['match_percentage'], reverse=True)
     return matched_jobs
 
-def calculate_dashboard_metrics() -> Dict:
-    """Calcule les métriques pour le dashboard (DB prioritaire)."""
-    users = load_user_preferences()
-    jobs = load_job_offers()
-    cv_data = load_cv_data()
+def match_jobs_for_user(user_name: str) -> Tuple[List[Dict], int]:
+    """Offres correspondant au CV d'un utilisateur et score moyen (en %), avec cache.
 
-    # Emails envoyés: utiliser la DB si dispo
-    emails_sent = 0
-    if DB_AVAILABLE:
+    Retourne ([], 0) si l'utilisateur n'a pas de CV.
+    """
+    return _match_jobs_for_user(user_name, _file_mtime(CV_FILE), _file_mtime(JOB_OFFERS_FILE))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _match_jobs_for_user(user_name: str, cv_mtime: Optional[float], jobs_mtime: Optional[float]) -> Tuple[List[Dict], int]:
+    cv = load_cv_by_name_index().get(user_name)
+    if not cv:
+        return [], 0
+    user_skills = cv.get('analysis', {}).get('skills', [])
+    matched_jobs = get_matching_jobs(user_skills, min_match_percentage=0)
+    avg_score = round(sum(j['match_percentage'] for j in matched_jobs) / len(matched_jobs)) if matched_jobs else 0
+    return matched_jobs, avg_score
+
+def _dashboard_counts() -> Optional[Dict]:
+    """Comptages agrégés côté SQL (None si la DB est indisponible)"""
+    if not DB_AVAILABLE:
+        return None
+    try:
+        session = get_session()
         try:
-            session = get_session()
-            # Compter toutes les notifications envoyées
-            emails_sent = session.query(Notification).count()
+            def count(model, *where):
+                stmt = select(func.count()).select_from(model)
+                if where:
+                    stmt = stmt.where(*where)
+                return session.execute(stmt).scalar_one()
+            return {
+                'emails_sent': count(Notification),
+                'offers_found': count(JobOffer),
+                'active_users': count(Preference, Preference.notify_via_email.is_(True)),
+            }
+        finally:
             session.close()
-        except Exception:
-            emails_sent = 0
-    if not emails_sent:
-        # Fallback: base sur utilisateurs actifs (approximation)
-        emails_sent = sum(1 for user in users if user.get('notify_via_email', False))
+    except Exception:
+        return None
 
-    # Nombre total d'offres
-    total_offers = len(jobs)
+def calculate_dashboard_metrics() -> Dict:
+    """Calcule les métriques pour le dashboard (DB prioritaire)."""
+    # Chargements indépendants (fichiers / DB): en parallèle
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        jobs, cv_data, counts = ex.map(
+            lambda f: f(),
+            (load_job_offers, load_cv_data, _dashboard_counts),
+        )
+
+    if counts is None:
+        # Sans DB: compter à partir des fichiers JSON
+        users = load_user_preferences()
+        active_users = sum(1 for user in users if user.get('notify_via_email', False))
+        counts = {'emails_sent': 0, 'offers_found': len(jobs), 'active_users': active_users}
+    if not counts['emails_sent']:
+        # Fallback: base sur utilisateurs actifs (approximation)
+        counts['emails_sent'] = counts['active_users']
 
-    # Calculer le score moyen de matching
+    # Calculer le score moyen de matching (séquentiel: calcul CPU), avec un
+    # seul index des offres pour tous les CV; les CV sans compétences sont ignorés
+    index = build_job_index(jobs)
     all_scores = []
     for cv in cv_data:
         skills = cv.get('analysis', {}).get('skills', [])
         if skills:
-            matched = get_matching_jobs(skills, min_match_percentage=0)
+            matched = get_matching_jobs(skills, min_match_percentage=0, index=index)
             if matched:
                 avg_score = sum(j['match_percentage'] for j in matched) / len(matched)
                 all_scores.append(avg_score)
@@ -199,40 +395,44 @@ def calculate_dashboard_metrics() -> Dict:
     avg_match_score = round(sum(all_scores) / len(all_scores)) if all_scores else 0
 
     return {
-        'emails_sent': int(emails_sent),
-        'offers_found': total_offers,
+        'emails_sent': int(counts['emails_sent']),
+        'offers_found': counts['offers_found'],
         'avg_score': avg_match_score,
-        'active_users': len([u for u in users if u.get('notify_via_email', False)])
+        'active_users': counts['active_users']
     }
 
 def load_notification_history(user_email: str = None, limit: int = 10) -> List[Dict]:
-    """Charge l'historique des notifications (DB prioritaire)."""
+    """Charge l'historique des notifications (DB prioritaire), avec cache."""
+    return _load_notification_history(user_email, limit, _file_mtime(NOTIFICATION_LOG_FILE))
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _load_notification_history(user_email: Optional[str], limit: int, mtime: Optional[float]) -> List[Dict]:
     if DB_AVAILABLE:
         try:
             session = get_session()
-            q = session.query(Notification, User).join(User, Notification.user_id == User.id)
+            stmt = (
+                select(Notification.sent_at, Notification.status, User.email, User.name)
+                .select_from(Notification)
+                .join(User, Notification.user_id == User.id)
+            )
             if user_email:
-                q = q.filter(User.email == user_email)
-            rows = q.order_by(Notification.sent_at.desc()).limit(limit).all()
+                stmt = stmt.where(User.email == user_email)
+            stmt = stmt.order_by(Notification.sent_at.desc()).limit(limit)
             result = []
-            for n, u in rows:
+            for r in session.execute(stmt).mappings():
                 result.append({
-                    'timestamp': getattr(n, 'sent_at', None).isoformat() if getattr(n, 'sent_at', None) else None,
-                    'recipient_email': u.email,
-                    'recipient_name': u.name,
+                    'timestamp': r['sent_at'].isoformat() if r['sent_at'] else None,
+                    'recipient_email': r['email'],
+                    'recipient_name': r['name'],
                     'job_count': 1,
-                    'status': n.status,
+                    'status': r['status'],
                 })
             session.close()
             return result
         except Exception:
             pass
-    history_file = DATA_DIR / "notification_history.json"
-    if not history_file.exists():
-        return []
     try:
-        with open(history_file, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+        history = read_notification_log()
     except Exception:
         return []
     history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -244,7 +444,9 @@ def format_notification_time(timestamp_str: str) -> str:
     """Formate un timestamp en temps relatif"""
     try:
         timestamp = datetime.fromisoformat(timestamp_str)
-        now = datetime.now()
+        # Même fuseau que le timestamp: aware pour la base (sent_at), naïf
+        # (heure locale) pour le journal JSON
+        now = datetime.now(timestamp.tzinfo)
         delta = now - timestamp
         
         if delta.days > 0:
@@ -1,16 +1,20 @@
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
 from datetime import datetime
 
 # Chemin vers le script run_once_notify.py
 BASE_DIR = Path(__file__).parent.parent.parent
 SCRIPTS_DIR = BASE_DIR / "scripts"
-VENV_PYTHON = BASE_DIR / "IA_agent" / "bin" / "python3"
+
+# Un seul worker: les scans ne se chevauchent pas, et les modules du scan
+# (spaCy, analyseurs...) restent importés d'un scan à l'autre
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-scan")
 
 def run_job_scan():
     """
-    Lance le scan des offres d'emploi en exécutant run_once_notify.py
+    Lance le scan des offres d'emploi en appelant run_once_notify.main()
+    dans le processus courant (pas de nouvel interpréteur à démarrer)
     Retourne True si succès, False sinon
     """
     try:
@@ -19,23 +23,21 @@ def run_job_scan():
         if not script_path.exists():
             return False, "Script run_once_notify.py introuvable"
         
-        # Exécuter le script avec le Python de l'environnement virtuel
-        result = subprocess.run(
-            [str(VENV_PYTHON), str(script_path)],
-            capture_output=True,
-            text=True,
-            timeout=120  # Timeout de 2 minutes
-        )
+        if str(SCRIPTS_DIR) not in sys.path:
+            sys.path.insert(0, str(SCRIPTS_DIR))
+        from run_once_notify import main as run_once_main
+
+        # Exécuter le scan dans le thread dédié
+        future = _EXECUTOR.submit(run_once_main)
+        returncode = future.result(timeout=120)  # Timeout de 2 minutes
         
-        if result.returncode == 0:
+        if returncode == 0:
             return True, f"Scan terminé avec succès ! Vérifiez vos emails."
         else:
-            # Récupérer les dernières lignes d'erreur
-            error_lines = result.stderr.split('\n')[-5:] if result.stderr else []
-            error_msg = '\n'.join(error_lines)
-            return False, f"Erreur lors du scan : {error_msg}"
+            return False, "Erreur lors du scan : voir les logs de run_once_notify"
             
-    except subprocess.TimeoutExpired:
+    except FutureTimeoutError:
+        # Le scan continue en arrière-plan; le prochain attendra qu'il se termine
         return False, "Le scan a pris trop de temps (timeout de 2 minutes)"
     except Exception as e:
         return False, f"Erreur inattendue : {str(e)}"
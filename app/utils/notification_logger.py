@@ -1,6 +1,13 @@
-import json
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+import msgspec
 
 # Optional DB (fallback to JSON)
 try:
@@ -11,53 +18,174 @@ except Exception:
     DB_AVAILABLE = False
 
 BASE_DIR = Path(__file__).parent.parent.parent
-NOTIFICATION_LOG_FILE = BASE_DIR / "src" / "data" / "notification_history.json"
+if str(BASE_DIR / "src") not in sys.path:
+    sys.path.insert(0, str(BASE_DIR / "src"))
+from utils.json_io import load_json
 
+DATA_DIR = BASE_DIR / "src" / "data"
+# Journal en ajout seul: trames msgpack préfixées par leur longueur (4 octets big-endian)
+NOTIFICATION_LOG_FILE = DATA_DIR / "notification_history.msgpack"
+# Ancien historique JSON, relu tant que le journal n'existe pas encore
+LEGACY_NOTIFICATION_FILE = DATA_DIR / "notification_history.json"
 
-def log_notification(recipient_email: str, recipient_name: str, job_count: int, status: str = "success"):
+MAX_HISTORY = 50
+# Au-delà de cette taille, le journal est réécrit avec les MAX_HISTORY dernières entrées
+COMPACT_THRESHOLD_BYTES = 64 * 1024
+
+_FILE_LOCK = threading.Lock()
+_ENC = msgspec.msgpack.Encoder()
+_DEC = msgspec.msgpack.Decoder()
+
+
+def _frame(entry: dict) -> bytes:
+    payload = _ENC.encode(entry)
+    return len(payload).to_bytes(4, 'big') + payload
+
+
+def read_notification_log():
     """
-    Enregistre une notification dans la DB si disponible, sinon JSON.
+    Lit le journal des notifications (au plus MAX_HISTORY dernières entrées).
+    Une trame incomplète en fin de fichier (écriture interrompue) est ignorée.
     """
-    if DB_AVAILABLE:
-        session = get_session()
-        try:
-            # Trouver ou créer l'utilisateur
-            user = None
-            if recipient_email:
-                user = session.query(User).filter_by(email=recipient_email).one_or_none()
-            if not user and recipient_name:
-                user = session.query(User).filter_by(name=recipient_name).one_or_none()
-            if not user:
-                user = User(name=recipient_name or "Utilisateur", email=recipient_email or None)
-                session.add(user)
-                session.flush()
-
-            # Enregistrer N entrées si job_count > 1 pour rester simple
-            count = max(1, int(job_count or 1))
-            now = datetime.utcnow()
-            for _ in range(count):
-                n = Notification(user_id=user.id, sent_at=now, status=status)
-                session.add(n)
-            session.commit()
-            return
-        except Exception:
-            session.rollback()
-        finally:
+    if not NOTIFICATION_LOG_FILE.exists():
+        if LEGACY_NOTIFICATION_FILE.exists():
             try:
-                session.close()
+                return load_json(LEGACY_NOTIFICATION_FILE)[-MAX_HISTORY:]
             except Exception:
-                pass
+                return []
+        return []
+    with open(NOTIFICATION_LOG_FILE, 'rb') as f:
+        data = f.read()
+    entries = []
+    pos, end = 0, len(data)
+    while pos + 4 <= end:
+        size = int.from_bytes(data[pos:pos + 4], 'big')
+        if pos + 4 + size > end:
+            break
+        entries.append(_DEC.decode(data[pos + 4:pos + 4 + size]))
+        pos += 4 + size
+    return entries[-MAX_HISTORY:]
+
+
+def _compact_notification_log():
+    """Réécrit le journal avec les dernières entrées seulement"""
+    entries = read_notification_log()
+    tmp_path = NOTIFICATION_LOG_FILE.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(_frame(e) for e in entries))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, NOTIFICATION_LOG_FILE)
 
-    # Fallback JSON
-    NOTIFICATION_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    history = []
-    if NOTIFICATION_LOG_FILE.exists():
+
+def _append_notification(entry: dict):
+    """Ajoute une trame au journal (reprend l'ancien JSON au premier ajout)"""
+    with _FILE_LOCK:  # appels possibles depuis le thread d'écriture DB
+        NOTIFICATION_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        if not NOTIFICATION_LOG_FILE.exists():
+            previous = read_notification_log()
+            if previous:
+                with open(NOTIFICATION_LOG_FILE, 'wb') as f:
+                    f.write(b''.join(_frame(e) for e in previous))
+        with open(NOTIFICATION_LOG_FILE, 'ab') as f:
+            f.write(_frame(entry))
+            size = f.tell()
+        if size > COMPACT_THRESHOLD_BYTES:
+            _compact_notification_log()
+
+
+def _resolve_user(session, recipient_email, recipient_name):
+    """Trouve ou crée l'utilisateur destinataire"""
+    user = None
+    if recipient_email:
+        user = session.query(User).filter_by(email=recipient_email).one_or_none()
+    if not user and recipient_name:
+        user = session.query(User).filter_by(name=recipient_name).one_or_none()
+    if not user:
+        user = User(name=recipient_name or "Utilisateur", email=recipient_email or None)
+        session.add(user)
+        session.flush()
+    return user
+
+
+def _write_batch(batch):
+    """Écrit un lot de notifications en DB: utilisateurs résolus une fois, un seul INSERT"""
+    session = get_session()
+    try:
+        user_ids = {}
+        rows = []
+        now = datetime.now(timezone.utc)  # une seule date pour tout le lot
+        for notification in batch:
+            key = (notification["recipient_email"], notification["recipient_name"])
+            if key not in user_ids:
+                user_ids[key] = _resolve_user(session, *key).id
+            # Enregistrer N entrées si job_count > 1 pour rester simple
+            count = max(1, int(notification["job_count"] or 1))
+            rows.extend({'user_id': user_ids[key], 'sent_at': now, 'status': notification["status"]} for _ in range(count))
+        session.execute(Notification.__table__.insert(), rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        # Fallback fichier pour tout le lot
+        for notification in batch:
+            _append_notification(notification)
+    finally:
         try:
-            with open(NOTIFICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-                history = json.load(f)
+            session.close()
         except Exception:
-            history = []
+            pass
+
+
+def _drain():
+    """Thread d'écriture: regroupe jusqu'à BATCH_SIZE notifications ou BATCH_WINDOW secondes"""
+    while True:
+        item = _Q.get()
+        if item is None:
+            return
+        batch = [item]
+        stop = False
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = _Q.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        _write_batch(batch)
+        if stop:
+            return
+
+
+def _stop_writer():
+    """À l'arrêt du processus: vider la file avant la fin du thread (daemon)"""
+    try:
+        _Q.put(None, timeout=5)
+    except queue.Full:
+        pass
+    _WRITER.join(timeout=5)
+
+
+# File des notifications à écrire en DB, consommée par un seul thread
+BATCH_SIZE = 100
+BATCH_WINDOW = 0.1  # secondes
+_Q: queue.Queue = queue.Queue(maxsize=10000)
+if DB_AVAILABLE:
+    _WRITER = threading.Thread(target=_drain, name="notification-writer", daemon=True)
+    _WRITER.start()
+    atexit.register(_stop_writer)
 
+
+def log_notification(recipient_email: str, recipient_name: str, job_count: int, status: str = "success"):
+    """
+    Enregistre une notification dans la DB si disponible (écriture asynchrone,
+    par lots), sinon dans le journal fichier.
+    """
     notification = {
         "timestamp": datetime.now().isoformat(),
         "recipient_email": recipient_email,
@@ -65,10 +193,15 @@ def log_notification(recipient_email: str, recipient_name: str, job_count: int,
         "job_count": job_count,
         "status": status
     }
-    history.append(notification)
-    history = history[-50:]
-    with open(NOTIFICATION_LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
+    if DB_AVAILABLE:
+        try:
+            _Q.put_nowait(notification)
+            return
+        except queue.Full:
+            pass
+
+    # Fallback fichier: une trame ajoutée au journal
+    _append_notification(notification)
 
 
 def get_notification_history(user_email: str = None, limit: int = 10):
@@ -85,7 +218,7 @@ def get_notification_history(user_email: str = None, limit: int = 10):
             result = []
             for n, u in rows:
                 result.append({
-                    "timestamp": (getattr(n, 'sent_at', None) or datetime.utcnow()).isoformat(),
+                    "timestamp": (getattr(n, 'sent_at', None) or datetime.now(timezone.utc)).isoformat(),
                     "recipient_email": u.email,
                     "recipient_name": u.name,
                     "job_count": 1,
@@ -100,12 +233,9 @@ def get_notification_history(user_email: str = None, limit: int = 10):
             except Exception:
                 pass
 
-    # Fallback JSON
-    if not NOTIFICATION_LOG_FILE.exists():
-        return []
+    # Fallback fichier
     try:
-        with open(NOTIFICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+        history = read_notification_log()
     except Exception:
         return []
     history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -142,12 +272,9 @@ def get_notification_stats(user_email: str = None):
             except Exception:
                 pass
 
-    # Fallback JSON
-    if not NOTIFICATION_LOG_FILE.exists():
-        return {"total_sent": 0, "total_jobs": 0, "last_notification": None}
+    # Fallback fichier
     try:
-        with open(NOTIFICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+        history = read_notification_log()
     except Exception:
         return {"total_sent": 0, "total_jobs": 0, "last_notification": None}
     if user_email:
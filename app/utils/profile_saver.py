@@ -1,17 +1,55 @@
-import json
+import atexit
+import sys
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 
 # Optional DB imports
 try:
     from db.session import get_session
     from db.models import User, Preference
+    from sqlalchemy import case, or_, select
+    from sqlalchemy.orm import joinedload
     DB_AVAILABLE = True
 except Exception:
     DB_AVAILABLE = False
 
 BASE_DIR = Path(__file__).parent.parent.parent
+if str(BASE_DIR / "src") not in sys.path:
+    sys.path.insert(0, str(BASE_DIR / "src"))
+from utils.json_io import load_json, dump_json, fsync_file
+
 DATA_DIR = BASE_DIR / "src" / "data"
+PREF_PATH = DATA_DIR / "user_preferences.json"
+
+# user_preferences.json gardé en mémoire, rechargé si le fichier change,
+# avec l'index nom -> position dans la liste
+_PREFS_CACHE = {'mtime': None, 'data': None, 'index': None}
+# Fichiers écrits sans fsync, synchronisés à l'arrêt
+_UNSYNCED = set()
+
+
+def _sync_written_files():
+    for path in list(_UNSYNCED):
+        fsync_file(path)
+    _UNSYNCED.clear()
+
+
+atexit.register(_sync_written_files)
+
+
+def _load_preferences(pref_path: Path) -> Tuple[list, Dict[str, int]]:
+    try:
+        mtime = pref_path.stat().st_mtime_ns
+    except OSError:
+        return [], {}
+    if mtime != _PREFS_CACHE['mtime']:
+        data = load_json(pref_path)
+        index = {}
+        for i, user in enumerate(data):
+            index.setdefault(user.get('name'), i)
+        _PREFS_CACHE.update(mtime=mtime, data=data, index=index)
+    return _PREFS_CACHE['data'], _PREFS_CACHE['index']
+
 
 def save_user_profile(user_name: str, profile_data: Dict):
     """
@@ -21,21 +59,24 @@ def save_user_profile(user_name: str, profile_data: Dict):
         if DB_AVAILABLE:
             session = get_session()
             try:
-                # Upsert user by email or name
+                # Upsert user by email or name: une seule requête, préférences
+                # chargées avec l'utilisateur (correspondance email prioritaire)
                 email = profile_data.get('email')
-                user = None
+                stmt = select(User).options(joinedload(User.preferences))
                 if email:
-                    user = session.query(User).filter_by(email=email).one_or_none()
-                if not user:
-                    user = session.query(User).filter_by(name=user_name).one_or_none()
+                    stmt = stmt.where(or_(User.email == email, User.name == user_name)).order_by(
+                        case((User.email == email, 0), else_=1)
+                    )
+                else:
+                    stmt = stmt.where(User.name == user_name)
+                user = session.execute(stmt).scalars().first()
                 if not user:
                     user = User(name=user_name, email=email)
                     session.add(user)
-                    session.flush()
 
-                pref = session.query(Preference).filter_by(user_id=user.id).one_or_none()
+                pref = user.preferences
                 if not pref:
-                    pref = Preference(user_id=user.id)
+                    pref = Preference(user=user)
                     session.add(pref)
 
                 pref.keywords = profile_data.get('keywords', [])
@@ -53,33 +94,24 @@ def save_user_profile(user_name: str, profile_data: Dict):
                 session.close()
 
         # JSON fallback
-        pref_path = DATA_DIR / "user_preferences.json"
-        
-        # Charger les données existantes
-        if pref_path.exists():
-            with open(pref_path, 'r', encoding='utf-8') as f:
-                preferences = json.load(f)
-        else:
-            preferences = []
+        # Charger les données existantes (depuis le cache si le fichier n'a pas changé)
+        preferences, index = _load_preferences(PREF_PATH)
         
         # Chercher l'utilisateur
-        user_found = False
-        for i, user in enumerate(preferences):
-            if user.get('name') == user_name:
-                # Mettre à jour les préférences
-                preferences[i].update({
-                    'email': profile_data.get('email'),
-                    'preferred_jobs': profile_data.get('keywords', []),
-                    'location': profile_data.get('location', ''),
-                    'contract_types': profile_data.get('contract_types', []),
-                    'min_match_score': profile_data.get('match_score', 70),
-                    'notify_via_email': profile_data.get('notify_via_email', True)
-                })
-                user_found = True
-                break
-        
-        # Si l'utilisateur n'existe pas, l'ajouter
-        if not user_found:
+        i = index.get(user_name)
+        if i is not None:
+            # Mettre à jour les préférences
+            preferences[i].update({
+                'email': profile_data.get('email'),
+                'preferred_jobs': profile_data.get('keywords', []),
+                'location': profile_data.get('location', ''),
+                'contract_types': profile_data.get('contract_types', []),
+                'min_match_score': profile_data.get('match_score', 70),
+                'notify_via_email': profile_data.get('notify_via_email', True)
+            })
+        else:
+            # Si l'utilisateur n'existe pas, l'ajouter
+            index[user_name] = len(preferences)
             preferences.append({
                 'name': user_name,
                 'email': profile_data.get('email'),
@@ -91,10 +123,13 @@ def save_user_profile(user_name: str, profile_data: Dict):
             })
         
         # Sauvegarder
-        with open(pref_path, 'w', encoding='utf-8') as f:
-            json.dump(preferences, f, indent=2, ensure_ascii=False)
+        dump_json(preferences, PREF_PATH, fsync=False)
+        _UNSYNCED.add(PREF_PATH)
+        _PREFS_CACHE.update(mtime=PREF_PATH.stat().st_mtime_ns, data=preferences, index=index)
         
         return True, "Profil sauvegardé avec succès !"
         
     except Exception as e:
+        # La copie en mémoire a pu être modifiée sans être écrite
+        _PREFS_CACHE['mtime'] = None
         return False, f"Erreur lors de la sauvegarde : {str(e)}"
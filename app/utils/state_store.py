@@ -1,52 +1,127 @@
-import json
+import atexit
+import os
+import sys
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 BASE_DIR = Path(__file__).parent.parent.parent
+if str(BASE_DIR / "src") not in sys.path:
+    sys.path.insert(0, str(BASE_DIR / "src"))
+from utils.json_io import load_json, dump_json, fsync_file
+
 DATA_DIR = BASE_DIR / "src" / "data"
 STATE_FILE = DATA_DIR / "user_state.json"
 
+# Délai de regroupement des écritures (secondes)
+FLUSH_DELAY = 0.05
 
-def load_user_state(user_name: str) -> Dict:
-    """Charge l'état UI (favoris, vues, masquées) pour un utilisateur."""
-    if STATE_FILE.exists():
-        try:
-            with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception:
-            data = {}
-    else:
+# Contenu de user_state.json gardé en mémoire, rechargé si le fichier change.
+# Tant que _DIRTY est vrai, la version mémoire fait foi (écriture en attente).
+_LOCK = threading.Lock()
+_DATA: Optional[Dict] = None
+_DATA_MTIME: Optional[float] = None
+_DIRTY = False
+_UNSYNCED = False
+_TIMER: Optional[threading.Timer] = None
+
+
+def _state_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(STATE_FILE)
+    except OSError:
+        return None
+
+
+def _all_states() -> Dict:
+    """Retourne l'état de tous les utilisateurs (appelé sous _LOCK)"""
+    global _DATA, _DATA_MTIME
+    if _DIRTY:
+        return _DATA
+    mtime = _state_mtime()
+    if _DATA is None or mtime != _DATA_MTIME:
         data = {}
+        if mtime is not None:
+            try:
+                data = load_json(STATE_FILE)
+            except Exception:
+                data = {}
+        _DATA, _DATA_MTIME = data, mtime
+    return _DATA
+
+
+def _uniq(items) -> list:
+    """Dédoublonne en conservant l'ordre (une seule passe, set de contrôle)"""
+    seen = set()
+    seen_add = seen.add
+    out = []
+    append = out.append
+    for item in items:
+        if item not in seen:
+            seen_add(item)
+            append(item)
+    return out
 
-    state = data.get(user_name) or {
-        'favorites': [],
-        'viewed': [],
-        'hidden': [],
+
+def _normalize(state: Dict) -> Dict:
+    # Normaliser en listes uniques (nouvelles listes: l'appelant peut les modifier)
+    return {
+        'favorites': _uniq(state.get('favorites', [])),
+        'viewed': _uniq(state.get('viewed', [])),
+        'hidden': _uniq(state.get('hidden', [])),
     }
-    # Normaliser en listes uniques
-    state['favorites'] = list(dict.fromkeys(state.get('favorites', [])))
-    state['viewed'] = list(dict.fromkeys(state.get('viewed', [])))
-    state['hidden'] = list(dict.fromkeys(state.get('hidden', [])))
-    return state
+
+
+def load_user_state(user_name: str) -> Dict:
+    """Charge l'état UI (favoris, vues, masquées) pour un utilisateur.
+
+    Le fichier n'est relu que si sa date de modification a changé.
+    """
+    with _LOCK:
+        return _normalize(_all_states().get(user_name) or {})
 
 
 def save_user_state(user_name: str, state: Dict) -> None:
-    """Sauvegarde l'état UI pour un utilisateur."""
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if STATE_FILE.exists():
-        try:
-            with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception:
-            data = {}
-    else:
-        data = {}
+    """Sauvegarde l'état UI pour un utilisateur.
+
+    La mise à jour est immédiate en mémoire; l'écriture disque est différée de
+    FLUSH_DELAY pour regrouper les clics rapprochés en une seule écriture.
+    """
+    global _DIRTY, _TIMER
+    with _LOCK:
+        data = _all_states()
+        data[user_name] = _normalize(state)
+        _DIRTY = True
+        if _TIMER is None:
+            _TIMER = threading.Timer(FLUSH_DELAY, _flush)
+            _TIMER.daemon = True
+            _TIMER.start()
+
+
+def _flush() -> None:
+    """Écrit l'état en attente sur disque (atomique, sans fsync)"""
+    global _DATA_MTIME, _DIRTY, _UNSYNCED, _TIMER
+    with _LOCK:
+        _TIMER = None
+        if not _DIRTY:
+            return
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        dump_json(_DATA, STATE_FILE, fsync=False)
+        _DATA_MTIME = _state_mtime()
+        _DIRTY = False
+        _UNSYNCED = True
+
+
+def _flush_sync() -> None:
+    """Écrit l'état en attente et le synchronise sur disque (à l'arrêt)"""
+    global _UNSYNCED
+    timer = _TIMER
+    if timer is not None:
+        timer.cancel()
+    _flush()
+    if _UNSYNCED:
+        fsync_file(STATE_FILE)
+        _UNSYNCED = False
 
-    data[user_name] = {
-        'favorites': list(dict.fromkeys(state.get('favorites', []))),
-        'viewed': list(dict.fromkeys(state.get('viewed', []))),
-        'hidden': list(dict.fromkeys(state.get('hidden', []))),
-    }
 
-    with open(STATE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+atexit.register(_flush_sync)
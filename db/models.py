@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Boolean, UniqueConstraint, JSON
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Boolean, UniqueConstraint, Index, JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -9,17 +9,25 @@ class Base(DeclarativeBase):
     pass
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class User(Base):
     __tablename__ = "users"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(120), index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
     cvs: Mapped[list["CV"]] = relationship(back_populates="user")
     preferences: Mapped[Optional["Preference"]] = relationship(back_populates="user", uselist=False)
     states: Mapped[Optional["UserState"]] = relationship(back_populates="user", uselist=False)
 
+    __table_args__ = (
+        Index('ix_user_name_email', 'name', 'email'),
+    )
+
 
 class CV(Base):
     __tablename__ = "cvs"
@@ -27,8 +35,8 @@ class CV(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     file_path: Mapped[str] = mapped_column(String(500))
     analysis: Mapped[dict] = mapped_column(JSON)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
     user: Mapped[User] = relationship(back_populates="cvs")
 
@@ -51,8 +59,8 @@ class JobOffer(Base):
     title: Mapped[str] = mapped_column(String(255))
     company: Mapped[str] = mapped_column(String(255))
     description: Mapped[str] = mapped_column(String(4000))
-    url: Mapped[str] = mapped_column(String(1000), unique=True)
-    source: Mapped[Optional[str]] = mapped_column(String(120))
+    url: Mapped[str] = mapped_column(String(1000), unique=True, index=True)
+    source: Mapped[Optional[str]] = mapped_column(String(120), index=True)
     created: Mapped[Optional[str]] = mapped_column(String(64))
     requirements: Mapped[dict] = mapped_column(JSON, default=dict)
     extracted_skills: Mapped[list] = mapped_column(JSON, default=list)
@@ -67,12 +75,16 @@ class Notification(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     offer_id: Mapped[Optional[int]] = mapped_column(ForeignKey("job_offers.id"), nullable=True)
-    sent_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
     status: Mapped[str] = mapped_column(String(50), default="success")
 
     user: Mapped["User"] = relationship("User")
     offer: Mapped[Optional["JobOffer"]] = relationship("JobOffer")
 
+    __table_args__ = (
+        Index('ix_notif_user_sent', 'user_id', 'sent_at'),
+    )
+
 
 class UserState(Base):
     __tablename__ = "user_state"
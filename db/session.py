@@ -1,7 +1,8 @@
 import os
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 
 def get_database_url() -> str:
@@ -11,9 +12,38 @@ def get_database_url() -> str:
 
 
 DATABASE_URL = get_database_url()
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# SQLite: connections are shared across threads (Streamlit, notification writer)
+_engine_kwargs = {"connect_args": {"check_same_thread": False}} if IS_SQLITE else {}
+if IS_SQLITE and (DATABASE_URL in ("sqlite://", "sqlite:///") or ":memory:" in DATABASE_URL):
+    # In-memory DB only lives as long as its single connection
+    _engine_kwargs["poolclass"] = StaticPool
+else:
+    # Keep opened connections (and their PRAGMAs) across get_session() calls
+    _engine_kwargs.update(poolclass=QueuePool, pool_size=5, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, echo=False, future=True, **_engine_kwargs)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+if IS_SQLITE:
+    # WAL + synchronous=NORMAL: no fsync on every commit, readers don't block the writer
+    _SQLITE_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-64000",
+        "PRAGMA mmap_size=268435456",
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for pragma in _SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 
 def get_session():
     return SessionLocal()
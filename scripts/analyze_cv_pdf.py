@@ -1,6 +1,5 @@
 import os
 import sys
-import json
 import logging
 from pathlib import Path
 
@@ -9,18 +8,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 from dotenv import load_dotenv
 load_dotenv()
 
+import spacy
+
 from agents.cv_analyzer import CVAnalyzer
+from utils.json_io import load_json, dump_json
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SPACY_MODEL = os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
+
+# Modèle chargé une seule fois; seule la NER est utilisée par l'analyseur
+try:
+    _NLP = spacy.load(SPACY_MODEL, disable=["parser", "tagger"])
+except OSError:
+    _NLP = None  # CVAnalyzer lèvera une erreur explicite avec la commande d'installation
+
 
 def main():
     cv_json_path = Path(__file__).parent.parent / 'src' / 'data' / 'cv_data.json'
     
     try:
-        with open(cv_json_path, 'r', encoding='utf-8') as f:
-            cv_data = json.load(f)
+        cv_data = load_json(cv_json_path)
     except Exception as e:
         logger.error(f"Failed to load cv_data.json: {e}")
         return 1
@@ -30,9 +39,8 @@ def main():
         return 1
     
     logger.info(f"Found {len(cv_data)} CV entry/entries in cv_data.json")
-    spacy_model = os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
-    
-    analyzer = CVAnalyzer(cv_data, spacy_model)
+
+    analyzer = CVAnalyzer(cv_data, _NLP if _NLP is not None else SPACY_MODEL)
     analyzer.analyze_cvs()
 
     all_skills = analyzer.get_all_skills()
@@ -44,8 +52,8 @@ def main():
         logger.info(f"CV '{name}' now has {len(skills)} skills: {skills}")
 
     try:
-        with open(cv_json_path, 'w', encoding='utf-8') as f:
-            json.dump(cv_data, f, indent=2, ensure_ascii=False)
+        # Une seule écriture du document sérialisé (orjson si disponible)
+        dump_json(cv_data, cv_json_path)
         logger.info(f"✅ Successfully updated {cv_json_path}")
         return 0
     except Exception as e:
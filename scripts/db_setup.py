@@ -1,12 +1,15 @@
 import json
+from datetime import datetime, timezone
 from pathlib import Path
 import sys
 from dotenv import load_dotenv
+from sqlalchemy import insert, select
 
 # Ensure project root is on sys.path for 'db' package imports
 ROOT = Path(__file__).parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'app' / 'utils'))
 
 # Load environment variables (e.g., DATABASE_URL) from .env if present
 load_dotenv()
@@ -19,11 +22,40 @@ DATA = ROOT / 'src' / 'data'
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables: add indexes introduced since (IF NOT EXISTS)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _offer_insert():
+    """INSERT de JobOffer ignorant les URL déjà présentes, None si non supporté"""
+    if engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(JobOffer).on_conflict_do_nothing(index_elements=['url'])
 
 
 def import_from_json():
     session = get_session()
     try:
+        # Index des utilisateurs existants (une seule requête); les nouveaux
+        # utilisateurs y sont ajoutés au fur et à mesure, sans flush par ligne
+        users_by_email = {}
+        users_by_name = {}
+
+        def register(user):
+            if user.email:
+                users_by_email[user.email] = user
+            users_by_name.setdefault(user.name, user)
+
+        for user in session.execute(select(User)).scalars():
+            register(user)
+        prefs_by_user_id = {pref.user_id: pref for pref in session.execute(select(Preference)).scalars()}
+
         # Import users + CVs
         cv_file = DATA / 'cv_data.json'
         if cv_file.exists():
@@ -31,21 +63,22 @@ def import_from_json():
                 cv_list = json.loads(cv_file.read_text(encoding='utf-8'))
             except Exception:
                 cv_list = []
+            new_cvs = []
             for entry in cv_list or []:
                 name = entry.get('name') or 'Utilisateur'
                 email = entry.get('email') or None
                 user = None
                 if email:
-                    user = session.query(User).filter_by(email=email).one_or_none()
+                    user = users_by_email.get(email)
                 if not user:
                     user = User(name=name, email=email or f"{name}@example.com")
                     session.add(user)
-                    session.flush()
+                    register(user)
                 # Add CV
                 path = entry.get('path') or ''
                 analysis = entry.get('analysis') or {}
-                cv = CV(user_id=user.id, file_path=path, analysis=analysis)
-                session.add(cv)
+                new_cvs.append(CV(user=user, file_path=path, analysis=analysis))
+            session.add_all(new_cvs)
 
         # Import preferences
         pref_file = DATA / 'user_preferences.json'
@@ -59,58 +92,74 @@ def import_from_json():
                 email = p.get('email')
                 user = None
                 if email:
-                    user = session.query(User).filter_by(email=email).one_or_none()
+                    user = users_by_email.get(email)
                 if not user and name:
-                    user = session.query(User).filter_by(name=name).one_or_none()
+                    user = users_by_name.get(name)
                 if not user and email:
                     user = User(name=name or 'Utilisateur', email=email)
                     session.add(user)
-                    session.flush()
+                    register(user)
                 if user:
-                    pref = session.query(Preference).filter_by(user_id=user.id).one_or_none()
+                    pref = prefs_by_user_id.get(user.id) if user.id else user.preferences
                     if not pref:
-                        pref = Preference(user_id=user.id)
+                        pref = Preference(user=user)
                         session.add(pref)
+                        if user.id:
+                            prefs_by_user_id[user.id] = pref
                     pref.keywords = p.get('preferred_jobs') or []
                     pref.location = p.get('location') or ''
                     pref.contract_types = p.get('contract_types') or []
                     pref.min_match_score = int(p.get('min_match_score') or 70)
                     pref.notify_via_email = bool(p.get('notify_via_email', True))
 
-        # Import job offers
+        # Import job offers: un seul INSERT multi-lignes, les URL déjà en base
+        # sont ignorées par la base elle-même (ON CONFLICT DO NOTHING)
         jobs_file = DATA / 'job_offers.json'
         if jobs_file.exists():
             try:
                 jobs = json.loads(jobs_file.read_text(encoding='utf-8'))
             except Exception:
                 jobs = []
+            offer_insert = _offer_insert()
+            if offer_insert is None:
+                # Dialecte sans ON CONFLICT: URLs existantes chargées une fois
+                offer_insert = insert(JobOffer)
+                known_urls = set(session.execute(select(JobOffer.url)).scalars())
+            else:
+                known_urls = set()
+            offer_rows = []
             for j in jobs or []:
                 url = j.get('url') or ''
-                if not url:
+                if not url or url in known_urls:
                     continue
-                exists = session.query(JobOffer).filter_by(url=url).one_or_none()
-                if exists:
-                    continue
-                offer = JobOffer(
+                known_urls.add(url)
+                # Tronquer seulement si nécessaire (évite une copie de la chaîne)
+                description = j.get('description') or ''
+                if len(description) > 3900:
+                    description = description[:3900]
+                offer_rows.append(dict(
                     title=j.get('title',''),
                     company=j.get('company',''),
-                    description=j.get('description','')[:3900],
+                    description=description,
                     url=url,
                     source=j.get('source',''),
                     created=j.get('created',''),
                     requirements=j.get('requirements') or {},
                     extracted_skills=j.get('skills') or [],
-                )
-                session.add(offer)
+                ))
+            if offer_rows:
+                session.execute(offer_insert, offer_rows)
 
-        # Import notification history (optional)
-        notif_file = DATA / 'notification_history.json'
-        if notif_file.exists():
-            try:
-                notif_list = json.loads(notif_file.read_text(encoding='utf-8'))
-            except Exception:
-                notif_list = []
-            for n in notif_list or []:
+        # Import notification history (optional): journal msgpack de
+        # notification_logger, ou l'ancien notification_history.json
+        try:
+            from notification_logger import read_notification_log
+            notif_list = read_notification_log()
+        except Exception:
+            notif_list = []
+        if notif_list:
+            pending = []
+            for n in notif_list:
                 name = n.get('recipient_name') or 'Utilisateur'
                 email = n.get('recipient_email')
                 status = n.get('status', 'success')
@@ -118,27 +167,33 @@ def import_from_json():
                 # Resolve or create user
                 user = None
                 if email:
-                    user = session.query(User).filter_by(email=email).one_or_none()
+                    user = users_by_email.get(email)
                 if not user:
-                    user = session.query(User).filter_by(name=name).one_or_none()
+                    user = users_by_name.get(name)
                 if not user:
                     user = User(name=name, email=email)
                     session.add(user)
-                    session.flush()
+                    register(user)
                 # Create one row per job (approx), else single row
                 count = int(n.get('job_count') or 1)
                 when = None
                 try:
-                    from datetime import datetime
                     when = datetime.fromisoformat(ts) if ts else None
                 except Exception:
                     when = None
-                for _ in range(max(1, count)):
-                    notif = Notification(user_id=user.id, status=status)
-                    if when:
-                        notif.sent_at = when
-                    session.add(notif)
+                pending.append((user, status, when or datetime.now(timezone.utc), max(1, count)))
+
+            # Un flush attribue les ids des nouveaux utilisateurs, puis un seul
+            # INSERT Core (executemany) pour toutes les lignes de notification
+            session.flush()
+            notif_rows = [
+                {'user_id': user.id, 'status': status, 'sent_at': when}
+                for user, status, when, count in pending
+                for _ in range(count)
+            ]
+            session.execute(insert(Notification), notif_rows)
 
+        # Une seule transaction pour tout l'import
         session.commit()
         print('DB import completed')
     except Exception as e:
@@ -1,7 +1,9 @@
 import os
 import sys
 import logging
-import json
+from logging.handlers import TimedRotatingFileHandler
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -10,7 +12,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 try:
     sys.path.insert(0, str(Path(__file__).parent.parent))
     from db.session import get_session
-    from db.models import User, CV as CVModel, Preference, JobOffer as JobOfferModel
+    from db.models import CV as CVModel, Preference, JobOffer as JobOfferModel
+    from sqlalchemy.orm import joinedload
     DB_AVAILABLE = True
 except Exception:
     DB_AVAILABLE = False
@@ -18,45 +21,66 @@ except Exception:
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.cv_analyzer import CVAnalyzer
-from agents.job_offer_analyzer import JobOfferAnalyzer
-from agents.motivation_letter_generator import MotivationLetterGenerator
-from agents.notification_agent import NotificationAgent
 from utils.email_sender import EmailSender
-from utils.adzuna_api import fetch_from_adzuna
-from utils.job_fetcher import filter_offers_by_title_and_location
+from utils.job_offer_sync import fetch_and_persist_offers, save_offers_to_db
+from utils.json_io import load_json, dump_json
+from utils.cv_cache import analyze_cvs_cached
 
-log_dir = Path(__file__).parent.parent / 'logs'
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / 'src' / 'data'
+CV_JSON = DATA_DIR / 'cv_data.json'
+PREFS_JSON = DATA_DIR / 'user_preferences.json'
+
+# Configuration lue une fois au chargement (après load_dotenv)
+JOB_SOURCE = os.environ.get('JOB_SOURCE', '').lower()
+JOB_LOCATION = os.environ.get('JOB_LOCATION', 'paris')
+
+log_dir = ROOT / 'logs'
 log_dir.mkdir(exist_ok=True)
 
-log_file = log_dir / f"scheduler_{datetime.now().strftime('%Y%m%d')}.log"
+log_file = log_dir / 'scheduler.log'
 
+# Rotation à minuit par le handler lui-même (scheduler.log.AAAA-MM-JJ, 14 jours);
+# basicConfig ne fait rien si la journalisation est déjà configurée
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
+        TimedRotatingFileHandler(log_file, when='midnight', backupCount=14, encoding='utf-8'),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger('scheduler')
 
+# Nombre maximal de destinataires notifiés en parallèle
+NOTIFY_WORKERS = 8
+
+SEEN_OFFERS_FILE = log_dir / 'seen_offers.txt'
+# Intervalle de relève adaptatif: doublé après un passage sans nouvelle offre,
+# ramené au minimum dès qu'il y en a (la tâche planifiée peut tourner souvent).
+# Le cache Adzuna n'est gardé que MIN_POLL_INTERVAL: une relève due interroge
+# l'API au lieu de rejouer la réponse de l'heure
+POLL_STATE_FILE = log_dir / 'poll_state.json'
+MIN_POLL_INTERVAL = 5 * 60
+MAX_POLL_INTERVAL = 60 * 60
+LEGACY_SEEN_OFFERS_FILE = log_dir / 'seen_offers.json'
+
+
+# cv_data.json déjà parsé, réutilisé tant que le fichier ne change pas
+_CV_JSON_CACHE = {}
+
 
 def load_cv_data():
     if DB_AVAILABLE:
         try:
             session = get_session()
-            rows = (
-                session.query(CVModel, User)
-                .join(User, CVModel.user_id == User.id)
-                .all()
-            )
+            # Utilisateur chargé dans la même requête (JOIN), pas de lazy load
+            rows = session.query(CVModel).options(joinedload(CVModel.user, innerjoin=True)).all()
             cv_list = []
-            base_dir = Path(__file__).parent.parent
-            for cv, user in rows:
+            for cv in rows:
                 cv_list.append({
-                    'name': user.name,
-                    'email': user.email,
+                    'name': cv.user.name,
+                    'email': cv.user.email,
                     'path': cv.file_path,  # stored relative to project root
                     'analysis': cv.analysis or {}
                 })
@@ -64,10 +88,13 @@ def load_cv_data():
             return cv_list
         except Exception as e:
             logger.warning(f"DB load_cv_data failed, falling back to JSON: {e}")
-    cv_json = Path(__file__).parent.parent / 'src' / 'data' / 'cv_data.json'
     try:
-        with open(cv_json, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        mtime = CV_JSON.stat().st_mtime_ns
+        if _CV_JSON_CACHE.get('mtime') != mtime:
+            _CV_JSON_CACHE['data'] = load_json(CV_JSON)
+            _CV_JSON_CACHE['mtime'] = mtime
+        # Copie des entrées: l'analyse remplace cv['analysis'] sans toucher au cache
+        return [dict(cv) if isinstance(cv, dict) else cv for cv in _CV_JSON_CACHE['data']]
     except Exception as e:
         logger.error(f"Failed to load CV data: {e}")
         return []
@@ -77,16 +104,12 @@ def load_user_preferences():
     if DB_AVAILABLE:
         try:
             session = get_session()
-            rows = (
-                session.query(Preference, User)
-                .join(User, Preference.user_id == User.id)
-                .all()
-            )
+            rows = session.query(Preference).options(joinedload(Preference.user, innerjoin=True)).all()
             prefs = []
-            for pref, user in rows:
+            for pref in rows:
                 prefs.append({
-                    'name': user.name,
-                    'email': user.email,
+                    'name': pref.user.name,
+                    'email': pref.user.email,
                     'preferred_jobs': pref.keywords or [],
                     'location': pref.location or '',
                     'contract_types': pref.contract_types or [],
@@ -97,10 +120,8 @@ def load_user_preferences():
             return prefs
         except Exception as e:
             logger.warning(f"DB load_user_preferences failed, falling back to JSON: {e}")
-    pref_json = Path(__file__).parent.parent / 'src' / 'data' / 'user_preferences.json'
     try:
-        with open(pref_json, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_json(PREFS_JSON)
     except Exception as e:
         logger.warning(f"Failed to load user preferences: {e}")
         return []
@@ -127,171 +148,229 @@ def load_seen_offers():
             return set(urls)
         except Exception as e:
             logger.warning(f"DB load_seen_offers failed, falling back to JSON: {e}")
-    seen_file = Path(__file__).parent.parent / 'logs' / 'seen_offers.json'
-    if seen_file.exists():
+    # Fichier texte: un identifiant d'offre par ligne, complété en ajout seul
+    if SEEN_OFFERS_FILE.exists():
+        try:
+            lines = SEEN_OFFERS_FILE.read_text(encoding='utf-8').splitlines()
+            seen_ids = set(lines)
+            seen_ids.discard('')
+            # Doublons (passages concurrents): compactage quand le fichier
+            # dépasse le double du nombre d'identifiants distincts
+            if len(lines) > 2 * len(seen_ids):
+                _compact_seen_offers(seen_ids)
+            return seen_ids
+        except Exception as e:
+            logger.warning(f"Failed to load seen offers: {e}")
+    elif LEGACY_SEEN_OFFERS_FILE.exists():
         try:
-            with open(seen_file, 'r', encoding='utf-8') as f:
-                return set(json.load(f))
+            seen_ids = set(load_json(LEGACY_SEEN_OFFERS_FILE))
+            # Migration vers le format texte
+            save_seen_offers(seen_ids)
+            return seen_ids
         except Exception as e:
             logger.warning(f"Failed to load seen offers: {e}")
     return set()
 
 
-def save_seen_offers(seen_ids):
+def _offer_id(offer):
+    offer_id = offer.get('url', '') or offer.get('title', '')
+    # Les identifiants sont stockés un par ligne
+    return ' '.join(offer_id.splitlines())
+
+
+def save_seen_offers(new_ids):
+    """Ajoute les identifiants nouvellement vus (sans réécrire le fichier)"""
     # DB: rien à faire — la persistance se fait via l'insertion des offres
-    if DB_AVAILABLE:
+    if DB_AVAILABLE or not new_ids:
         return
-    seen_file = Path(__file__).parent.parent / 'logs' / 'seen_offers.json'
     try:
-        with open(seen_file, 'w', encoding='utf-8') as f:
-            json.dump(list(seen_ids), f, indent=2)
+        with open(SEEN_OFFERS_FILE, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{offer_id}\n" for offer_id in new_ids))
     except Exception as e:
         logger.error(f"Failed to save seen offers: {e}")
 
 
-def fetch_new_jobs():
-    job_source = os.environ.get('JOB_SOURCE', '').lower()
-    
-    if job_source != 'adzuna':
-        logger.warning(f"Job source '{job_source}' not supported by scheduler (only 'adzuna')")
-        return []
-    
+def _compact_seen_offers(seen_ids):
+    """Réécrit le fichier des offres vues sans doublons (remplacement atomique)"""
+    tmp_file = SEEN_OFFERS_FILE.with_name(SEEN_OFFERS_FILE.name + '.tmp')
+    try:
+        tmp_file.write_text(''.join(f"{offer_id}\n" for offer_id in sorted(seen_ids)), encoding='utf-8')
+        os.replace(tmp_file, SEEN_OFFERS_FILE)
+        logger.info(f"Compacted seen offers file ({len(seen_ids)} ids)")
+    except Exception as e:
+        logger.warning(f"Failed to compact seen offers: {e}")
+
+
+def load_poll_state():
+    try:
+        return load_json(POLL_STATE_FILE)
+    except Exception:
+        return {}
+
+
+def record_poll(state, hit):
+    """Met à jour l'intervalle de relève selon le résultat du passage"""
+    now = time.time()
+    if hit:
+        state['interval'] = MIN_POLL_INTERVAL
+        state['last_hit'] = now
+    else:
+        state['interval'] = min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, state.get('interval', 0) * 2))
+    state['last_run'] = now
     try:
-        logger.info("Fetching job offers from Adzuna API")
-        titles = ['data analyst', 'data scientist']
-        location_keyword = os.environ.get('JOB_LOCATION', 'paris')
-        keywords = ' OR '.join(titles)
-        
-        offers = fetch_from_adzuna(keywords=keywords, location=location_keyword, max_results=50)
-        filtered = filter_offers_by_title_and_location(offers, titles, location_keyword)
-        
-        logger.info(f"Fetched {len(offers)} offers, {len(filtered)} after filtering")
-        # Persist offers to DB if available
-        if DB_AVAILABLE and filtered:
-            try:
-                session = get_session()
-                added = 0
-                for o in filtered:
-                    url = o.get('url') or ''
-                    if not url:
-                        continue
-                    exists = session.query(JobOfferModel).filter_by(url=url).one_or_none()
-                    if exists:
-                        continue
-                    offer = JobOfferModel(
-                        title=o.get('title',''),
-                        company=o.get('company',''),
-                        description=o.get('description','')[:3900],
-                        url=url,
-                        source=o.get('source',''),
-                        created=o.get('created',''),
-                        requirements=o.get('requirements') or {},
-                        extracted_skills=o.get('skills') or [],
-                    )
-                    session.add(offer)
-                    added += 1
-                session.commit()
+        dump_json(state, POLL_STATE_FILE)
+    except Exception as e:
+        logger.warning(f"Failed to save poll state: {e}")
+    logger.info(f"Next poll in {state['interval']}s")
+
+
+def fetch_new_jobs(seen_ids):
+    """Offres Adzuna pas encore vues: (nouvelles offres, leurs identifiants)
+
+    seen_ids est complété au passage; seules les nouvelles offres sont
+    écrites en base.
+    """
+    if JOB_SOURCE != 'adzuna':
+        logger.warning(f"Job source '{JOB_SOURCE}' not supported by scheduler (only 'adzuna')")
+        return [], []
+    
+    job_offers = fetch_and_persist_offers(location=JOB_LOCATION, save_to_db=False,
+                                          cache_ttl=MIN_POLL_INTERVAL)
+    if not job_offers:
+        logger.info("No job offers found.")
+        return [], []
+
+    # set.add / list.append retournent None: marquer l'offre vue dans le filtre
+    new_ids = []
+    new_offers = [
+        offer for offer in job_offers
+        if (offer_id := _offer_id(offer)) and offer_id not in seen_ids
+        and not seen_ids.add(offer_id) and not new_ids.append(offer_id)
+    ]
+    logger.info(f"Found {len(new_offers)} new offers (not seen before) out of {len(job_offers)}")
+
+    if new_offers:
+        try:
+            added = save_offers_to_db(new_offers)
+            if DB_AVAILABLE:
                 logger.info(f"Saved {added} offers to DB")
-            except Exception as e:
-                logger.warning(f"Failed to save offers to DB: {e}")
-            finally:
-                try:
-                    session.close()
-                except Exception:
-                    pass
-        return filtered
+        except Exception as e:
+            logger.warning(f"Failed to save offers to DB: {e}")
+    return new_offers, new_ids
+
+
+def _notify_one(notification_agent, cv, generated_letters, pref_by_email, pref_by_name):
+    """Envoie les notifications d'un collaborateur; retourne le nombre d'emails envoyés"""
+    recipient_email = cv['email']
+    recipient_name = cv.get('name', 'Collaborateur')
+    logger.info(f'Sending notifications to {recipient_name} ({recipient_email})')
+    # Appliquer le seuil de notification selon préférences
+    # (seuil passé à l'appel: l'agent est partagé entre les threads)
+    min_match_score = None
+    try:
+        pref = pref_by_email.get(recipient_email) or pref_by_name.get(recipient_name)
+        if pref and isinstance(pref.get('min_match_score'), (int, float)):
+            min_match_score = float(pref['min_match_score']) / 100.0
+            logger.info(f"Using min_match_score={min_match_score} for {recipient_name}")
     except Exception as e:
-        logger.error(f"Failed to fetch jobs: {e}")
-        return []
+        logger.warning(f"Failed to apply min_match_score for {recipient_name}: {e}")
 
+    # Un seul email récapitulatif par destinataire (au lieu d'un par offre)
+    sent = notification_agent.send_digest(
+        recipient_email,
+        generated_letters=generated_letters,
+        min_match_score=min_match_score,
+    )
+    logger.info(f'Sent {sent} notification(s) to {recipient_name}')
+    return sent
 
-def main():
+
+def main(spacy_model=None):
+    """Une relève complète; spacy_model: nom du modèle ou modèle déjà chargé (daemon)"""
     logger.info("=" * 80)
     logger.info(f"JOB NOTIFICATION SCHEDULER STARTED - {datetime.now()}")
     logger.info("=" * 80)
     
+    poll_state = load_poll_state()
+    wait = poll_state.get('last_run', 0) + poll_state.get('interval', 0) - time.time()
+    if wait > 0 and os.environ.get('SCHEDULER_FORCE', '').lower() != 'true':
+        logger.info(f"Next poll not due for {int(wait)}s (adaptive interval). Exiting.")
+        return 0
+
     cv_data = load_cv_data()
     user_prefs = load_user_preferences()
     if not cv_data:
         logger.error("No CV data found. Exiting.")
         return 1
 
-    job_offers = fetch_new_jobs()
-    if not job_offers:
-        logger.info("No job offers found. Exiting.")
-        return 0
-
-    # Sauvegarder les offres pour l'UI Streamlit
-    try:
-        job_file = Path(__file__).parent.parent / 'src' / 'data' / 'job_offers.json'
-        with open(job_file, 'w', encoding='utf-8') as f:
-            json.dump(job_offers, f, indent=2, ensure_ascii=False)
-        logger.info(f"Saved {len(job_offers)} offers to {job_file}")
-    except Exception as e:
-        logger.warning(f"Failed to save offers to job_offers.json: {e}")
-
+    # Offres déjà vues chargées avant toute écriture en base (en mode DB ce
+    # sont les URL enregistrées)
     seen_ids = load_seen_offers()
     logger.info(f"Previously seen {len(seen_ids)} offers")
 
-    new_offers = []
-    for offer in job_offers:
-        offer_id = offer.get('url', '') or offer.get('title', '')
-        if offer_id and offer_id not in seen_ids:
-            new_offers.append(offer)
-            seen_ids.add(offer_id)
-    
-    logger.info(f"Found {len(new_offers)} new offers (not seen before)")
+    new_offers, new_ids = fetch_new_jobs(seen_ids)
     
     if not new_offers:
         logger.info("No new offers to process. Exiting.")
+        record_poll(poll_state, hit=False)
         return 0
+    record_poll(poll_state, hit=True)
 
-    spacy_model = os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
+    # Agents importés seulement ici (spaCy...): un passage sans nouvelle
+    # offre se termine sans payer leur import
+    from agents.job_offer_analyzer import JobOfferAnalyzer
+    from agents.notification_agent import NotificationAgent
+
+    spacy_model = spacy_model or os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
     bert_model = os.environ.get('BERT_MODEL')
     gpt_key = os.environ.get('GPT_3_API_KEY')
     
-    cv_analyzer = CVAnalyzer(cv_data, spacy_model)
-    cv_analyzer.analyze_cvs()
+    # Extraction côté offres (indépendante des CV) pendant l'analyse des CV
+    job_analyzer = JobOfferAnalyzer(new_offers, bert_model)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        offers_future = executor.submit(job_analyzer.precompute_offers)
+        cv_analyzer = analyze_cvs_cached(cv_data, spacy_model, log_dir)
+        offers_future.result()
     candidate_skills = cv_analyzer.get_all_skills()
     
-    job_analyzer = JobOfferAnalyzer(new_offers, bert_model)
     job_analyzer.compare_job_offers(cv_skills=candidate_skills, cv_data=cv_data)
 
-    letter_generator = MotivationLetterGenerator(cv_analyzer, job_analyzer, gpt_key)
-    letter_generator.generate_letters()
+    # Lettres de motivation seulement avec une clé GPT (sinon modèle générique inutile)
+    generated_letters = {}
+    if gpt_key:
+        from agents.motivation_letter_generator import MotivationLetterGenerator
+
+        letter_generator = MotivationLetterGenerator(cv_analyzer, job_analyzer, gpt_key)
+        letter_generator.generate_letters()
+        generated_letters = letter_generator.get_generated_letters()
     
     email_sender = EmailSender()
     notification_agent = NotificationAgent(job_analyzer, email_sender)
     
-    generated_letters = letter_generator.get_generated_letters()
-    
     # Send notifications to all collaborators
     total_sent = 0
-    for cv in cv_data:
-        if isinstance(cv, dict) and cv.get('email'):
-            recipient_email = cv['email']
-            recipient_name = cv.get('name', 'Collaborateur')
-            logger.info(f'Sending notifications to {recipient_name} ({recipient_email})')
-            # Appliquer le seuil de notification selon préférences
-            try:
-                pref = next((p for p in user_prefs if (p.get('email') == recipient_email or p.get('name') == recipient_name)), None)
-                if pref and isinstance(pref.get('min_match_score'), (int, float)):
-                    notification_agent.min_match_score = float(pref['min_match_score']) / 100.0
-                    logger.info(f"Using min_match_score={notification_agent.min_match_score} for {recipient_name}")
-            except Exception as e:
-                logger.warning(f"Failed to apply min_match_score for {recipient_name}: {e}")
-            
-            sent = notification_agent.send_notifications(
-                recipient_email=recipient_email,
-                force=True,
-                generated_letters=generated_letters
-            )
-            total_sent += sent
-            logger.info(f'Sent {sent} notification(s) to {recipient_name}')
-    
+    # Envois en parallèle (E/S réseau); les connexions SMTP sont réutilisées
+    recipients = [cv for cv in cv_data if isinstance(cv, dict) and cv.get('email')]
+    # Index des préférences par email et par nom (la première entrée l'emporte)
+    pref_by_email = {}
+    pref_by_name = {}
+    for p in reversed(user_prefs):
+        if p.get('email'):
+            pref_by_email[p['email']] = p
+        if p.get('name'):
+            pref_by_name[p['name']] = p
+    if recipients:
+        with email_sender.session(), ThreadPoolExecutor(max_workers=min(NOTIFY_WORKERS, len(recipients))) as executor:
+            futures = [
+                executor.submit(_notify_one, notification_agent, cv, generated_letters, pref_by_email, pref_by_name)
+                for cv in recipients
+            ]
+            for future in as_completed(futures):
+                total_sent += future.result()
+
     logger.info(f"Total notifications sent: {total_sent}")
 
-    save_seen_offers(seen_ids)
+    save_seen_offers(new_ids)
     
     logger.info("=" * 80)
     logger.info(f"JOB NOTIFICATION SCHEDULER COMPLETED - {datetime.now()}")
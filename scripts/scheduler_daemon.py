@@ -0,0 +1,74 @@
+"""
+Scheduler en processus permanent
+
+Alternative à la tâche planifiée qui relance scheduler.py toutes les 5 minutes:
+le processus reste chargé (imports, modèle spaCy) et appelle scheduler.main()
+à intervalle fixe. L'intervalle adaptatif de scheduler.py s'applique toujours.
+
+Usage: python scripts/scheduler_daemon.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import scheduler
+from scheduler import logger
+
+try:
+    from apscheduler.schedulers.blocking import BlockingScheduler
+except ImportError:
+    BlockingScheduler = None
+
+# Fréquence des relèves (scheduler.main sort aussitôt si la suivante n'est pas due)
+DAEMON_INTERVAL = int(os.environ.get('SCHEDULER_INTERVAL', scheduler.MIN_POLL_INTERVAL))
+
+
+def _load_spacy_model():
+    """Modèle spaCy chargé une fois pour toute la durée du processus (nom si indisponible)"""
+    model_name = os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
+    try:
+        import spacy
+        return spacy.load(model_name)
+    except Exception as e:
+        logger.warning(f"spaCy model '{model_name}' not preloaded: {e}")
+        return model_name
+
+
+def run_job(spacy_model):
+    """Une relève; les erreurs sont journalisées sans arrêter le daemon"""
+    try:
+        scheduler.main(spacy_model=spacy_model)
+    except Exception as e:
+        logger.exception(f"Unexpected error: {e}")
+
+
+def main():
+    spacy_model = _load_spacy_model()
+    logger.info(f"Scheduler daemon started (every {DAEMON_INTERVAL}s)")
+
+    if BlockingScheduler is not None:
+        sched = BlockingScheduler()
+        sched.add_job(
+            run_job, 'interval', seconds=DAEMON_INTERVAL, args=[spacy_model],
+            max_instances=1, coalesce=True, next_run_time=datetime.now(),
+        )
+        sched.start()
+        return
+
+    # Sans APScheduler: boucle simple (une relève à la fois par construction)
+    while True:
+        started = time.monotonic()
+        run_job(spacy_model)
+        time.sleep(max(0.0, DAEMON_INTERVAL - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info("Scheduler daemon stopped by user")
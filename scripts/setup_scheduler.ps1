@@ -8,9 +8,10 @@ $Action = New-ScheduledTaskAction -Execute $PythonExe `
     -Argument $ScriptPath `
     -WorkingDirectory $WorkingDir
 
-# Create trigger (daily at 9 AM, repeating every hour)
+# Create trigger (daily at 9 AM, repeating every 5 minutes)
+# scheduler.py backs off on its own (5 min after new offers, up to 1 h when idle)
 $Trigger = New-ScheduledTaskTrigger -Daily -At 9am
-$Trigger.Repetition = (New-ScheduledTaskTrigger -Once -At 9am -RepetitionInterval (New-TimeSpan -Hours 1)).Repetition
+$Trigger.Repetition = (New-ScheduledTaskTrigger -Once -At 9am -RepetitionInterval (New-TimeSpan -Minutes 5)).Repetition
 
 # Create settings
 $Settings = New-ScheduledTaskSettingsSet `
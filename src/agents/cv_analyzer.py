@@ -1,22 +1,127 @@
 import os
+import re
+import hashlib
 import logging
 from collections import Counter
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 import PyPDF2
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 import spacy
+from spacy.lang.en.stop_words import STOP_WORDS as _STOP_WORDS_EN
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils.guards import check_file_exists, safe_extract_pdf_text
+from utils.guards import check_file_exists, iter_pdf_pages, safe_extract_pdf_text
+from utils.json_io import load_json, dump_json
+from utils.cv_cache import ANALYSIS_VERSION, spacy_model_name
+try:
+    from utils.nlp_extractors import (
+        extract_years_experience,
+        extract_education_level,
+        extract_soft_skills,
+        extract_certifications,
+    )
+except ImportError:
+    # Fallback relative import if running from src context
+    from nlp_extractors import (
+        extract_years_experience,
+        extract_education_level,
+        extract_soft_skills,
+        extract_certifications,
+    )
 
 logger = logging.getLogger(__name__)
 
+ROOT = Path(__file__).resolve().parents[2]
+# Analyses déjà calculées, une par PDF: <sha256>.json
+ANALYSIS_CACHE_DIR = ROOT / 'logs' / 'cv_analysis'
+# Au-delà de ce nombre de CV à analyser, extraction PDF et spaCy répartis sur
+# plusieurs processus (en dessous, le démarrage des processus coûte plus cher)
+PARALLEL_MIN_CVS = 4
+CV_WORKERS = int(os.environ.get('CV_WORKERS', os.cpu_count() or 1))
+
+
+@lru_cache(maxsize=4)
+def _load_spacy(model_name):
+    """Modèle spaCy chargé une fois par processus et par nom (partagé entre analyseurs)"""
+    return spacy.load(model_name)
+
+
+def _extract_pages(path):
+    """Textes des pages d'un PDF (fonction de module: exécutable dans un processus fils)"""
+    return list(iter_pdf_pages(path))
+
+
+# Liste exhaustive de compétences techniques recherchées (ordre du résultat)
+TECH_SKILLS = (
+    # Langages de programmation
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust', 'kotlin', 'swift', 'scala', 'r',
+
+    # Bases de données
+    'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'sqlite', 'redis', 'cassandra', 'dynamodb', 'mariadb',
+
+    # Outils BI et Data
+    'power bi', 'powerbi', 'tableau', 'looker', 'qlik', 'excel', 'dax', 'power query',
+
+    # Machine Learning / AI
+    'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'scikit-learn', 'keras', 'nlp', 'computer vision',
+
+    # Data Science
+    'pandas', 'numpy', 'scipy', 'matplotlib', 'seaborn', 'plotly', 'jupyter',
+
+    # Big Data / ETL
+    'spark', 'hadoop', 'airflow', 'kafka', 'etl', 'data pipeline', 'databricks',
+
+    # Cloud
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform',
+
+    # Web
+    'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring',
+
+    # Méthodologies
+    'agile', 'scrum', 'devops', 'ci/cd', 'git', 'jira',
+
+    # Autres compétences techniques
+    'api', 'rest', 'graphql', 'microservices', 'data modeling', 'data visualization',
+    'business intelligence', 'data analysis', 'statistical analysis', 'data mining',
+    'reporting', 'dashboard', 'kpi', 'analytics'
+)
+_TECH_SKILL_RANK = {skill: i for i, skill in enumerate(TECH_SKILLS)}
+# Mots fréquents à ne jamais prendre pour une compétence
+_SKILL_NOISE_WORDS = frozenset({'data', 'pour', 'avec', 'dans', 'cette', 'vous', 'votre', 'notre'})
+
+# Automate compilé une fois: un seul passage sur le texte pour toutes les compétences
+if ahocorasick:
+    _TECH_SKILL_AC = ahocorasick.Automaton()
+    for _skill in TECH_SKILLS:
+        _TECH_SKILL_AC.add_word(_skill, _skill)
+    _TECH_SKILL_AC.make_automaton()
+else:
+    # Repli: une regex en lookahead (la compétence la plus longue à chaque
+    # position); celles contenues dans une correspondance ('java' dans
+    # 'javascript') sont ajoutées via _TECH_SKILL_SUBWORDS
+    _TECH_SKILL_RE = re.compile('(?=(' + '|'.join(map(re.escape, sorted(TECH_SKILLS, key=len, reverse=True))) + '))')
+    _TECH_SKILL_SUBWORDS = {skill: {k for k in TECH_SKILLS if k in skill} for skill in TECH_SKILLS}
+
+
+def _scan_tech_skills(text_lower):
+    """Compétences de TECH_SKILLS présentes (sous-chaîne) dans le texte, dans l'ordre de la liste"""
+    if ahocorasick:
+        found = {skill for _, skill in _TECH_SKILL_AC.iter(text_lower)}
+    else:
+        found = set().union(*(_TECH_SKILL_SUBWORDS[m] for m in set(_TECH_SKILL_RE.findall(text_lower))))
+    return sorted(found, key=_TECH_SKILL_RANK.__getitem__)
+
 
 class CVAnalyzer:
     def __init__(self, cv_data, spacy_model=None):
@@ -26,98 +131,144 @@ class CVAnalyzer:
             self.cv_data = list(cv_data)
         except Exception:
             self.cv_data = cv_data
+        self._all_skills_cache = None
 
         # Load spaCy model: spacy_model may be a model name (str) or an already-loaded nlp object
+        self.model_name = spacy_model_name(spacy_model)
         if spacy_model and hasattr(spacy_model, 'pipe'):
             self.nlp = spacy_model
         else:
-            model_name = spacy_model or os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
+            model_name = self.model_name
             try:
-                self.nlp = spacy.load(model_name)
+                self.nlp = _load_spacy(model_name)
             except OSError:
                 raise RuntimeError(
                     f"spaCy model '{model_name}' not found. Install it with: python -m spacy download {model_name}"
                 )
 
-        # Ensure required NLTK resources are available (download only if missing)
-        try:
-            nltk.data.find('tokenizers/punkt_tab')
-        except LookupError:
-            nltk.download('punkt_tab')
+    def analyze_cvs(self):
+        # CV à analyser collectés d'abord, puis un seul passage spaCy par lots
+        # (nlp.pipe) sur toutes leurs pages
+        self._all_skills_cache = None
+        pending = [entry for entry in map(self._pending_entry, self.cv_data) if entry]
+        if not pending:
+            return
+        workers = min(CV_WORKERS, len(pending)) if len(pending) >= PARALLEL_MIN_CVS else 1
+        paths = [path for _, path, _ in pending]
+        if workers > 1:
+            # PDF indépendants: extraction répartie sur plusieurs processus
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pages_per_cv = list(executor.map(_extract_pages, paths))
+        else:
+            # Pages extraites au fil de l'eau: spaCy traite les premières
+            # pendant que les suivantes sont lues
+            pages_per_cv = [iter_pdf_pages(path) for path in paths]
 
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+        # (page, n° du CV) -> docs spaCy regroupés par CV, dans l'ordre
+        stream = ((page, i) for i, pages in enumerate(pages_per_cv) for page in pages)
+        docs_per_cv = [[] for _ in pending]
+        for doc, i in self.nlp.pipe(
+            stream, as_tuples=True, batch_size=8, disable=['parser', 'lemmatizer'], n_process=workers
+        ):
+            docs_per_cv[i].append(doc)
 
-    def analyze_cvs(self):
-        for cv in self.cv_data:
-            # If analysis already exists and is complete, skip reanalysis to preserve pre-filled skills
-            if isinstance(cv, dict) and 'analysis' in cv and cv['analysis'].get('skills'):
-                logger.debug(f'CV for {cv.get("name", "Unknown")} already analyzed; skipping')
-                continue
-            
-            # Extraire le texte du PDF
-            path = cv.get('path') if isinstance(cv, dict) else None
-            if not path:
-                logger.warning('CV entry missing "path": %s', cv)
-                continue
-
-            text = self.extract_pdf_text(path)
-            if not text:
+        for (cv, path, cache_file), docs in zip(pending, docs_per_cv):
+            if docs:
+                self._store_analysis(cv, docs, cache_file)
+            else:
                 logger.warning('No text extracted from %s', path)
-                continue
 
-            # Tokeniser le texte
-            tokens = word_tokenize(text.lower())
+    def analyze_entry(self, cv):
+        """Analyse une entrée CV (dict avec 'path') et y ajoute 'analysis'"""
+        self._all_skills_cache = None
+        entry = self._pending_entry(cv)
+        if not entry:
+            return
+        cv, path, cache_file = entry
+        docs = list(self.nlp.pipe(iter_pdf_pages(path), batch_size=8))
+        if not docs:
+            logger.warning('No text extracted from %s', path)
+            return
+        self._store_analysis(cv, docs, cache_file)
 
-            # Supprimer les stop words (utilise la langue anglaise par défaut; ajustez si nécessaire)
-            stop_words = set(stopwords.words('english'))
-            filtered_tokens = [token for token in tokens if token.isalpha() and token not in stop_words]
+    def _pending_entry(self, cv):
+        """CV restant à analyser: (cv, chemin du PDF, fichier de cache), ou None si rien à faire"""
+        # If analysis already exists and is complete, skip reanalysis to preserve pre-filled skills
+        if isinstance(cv, dict) and 'analysis' in cv and cv['analysis'].get('skills'):
+            logger.debug(f'CV for {cv.get("name", "Unknown")} already analyzed; skipping')
+            return None
+        
+        # Extraire le texte du PDF
+        path = cv.get('path') if isinstance(cv, dict) else None
+        if not path:
+            logger.warning('CV entry missing "path": %s', cv)
+            return None
 
-            # Compter les occurrences des mots
-            word_counts = Counter(filtered_tokens)
+        # Même PDF, même modèle, même version d'extraction: analyse relue du cache
+        cache_file = self._analysis_cache_file(path)
+        if cache_file is not None:
+            try:
+                cv['analysis'] = load_json(cache_file)
+                logger.info('Analyse relue du cache pour le CV : %s', cv.get('name'))
+                return None
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning('Failed to read CV analysis cache %s: %s', cache_file.name, e)
 
-            # Analyser les compétences clés
-            skills = self.identify_skills(word_counts)
+        return cv, path, cache_file
 
-            # Analyser les expériences
-            experiences = self.analyze_experiences(text)
+    def _store_analysis(self, cv, docs, cache_file=None):
+        """Construit l'analyse d'un CV à partir des docs spaCy de ses pages"""
+        text = ''.join(doc.text for doc in docs)
 
-            # Enrichir avec années d'expérience, niveau d'étude, soft skills, certifications
-            try:
-                from utils.nlp_extractors import (
-                    extract_years_experience,
-                    extract_education_level,
-                    extract_soft_skills,
-                    extract_certifications,
-                )
-            except ImportError:
-                # Fallback relative import if running from src context
-                from nlp_extractors import (
-                    extract_years_experience,
-                    extract_education_level,
-                    extract_soft_skills,
-                    extract_certifications,
-                )
+        # Mots du CV (tokens spaCy), sans ponctuation ni stop words (anglais + langue du modèle)
+        word_counts = Counter()
+        for doc in docs:
+            word_counts.update(
+                token.lower_ for token in doc
+                if token.is_alpha and not token.is_stop and token.lower_ not in _STOP_WORDS_EN
+            )
+
+        # Analyser les compétences clés
+        skills = self.identify_skills(word_counts)
 
-            years_exp = extract_years_experience(text)
-            education = extract_education_level(text)
-            soft_skills = extract_soft_skills(text)
-            certifications = extract_certifications(text)
+        # Analyser les expériences
+        experiences = self.analyze_experiences(text, docs=docs)
 
-            # Stocker les résultats
-            if isinstance(cv, dict):
-                cv['analysis'] = {
-                    'skills': skills,
-                    'experiences': experiences,
-                    'years_experience': years_exp,
-                    'education': education,
-                    'soft_skills': soft_skills,
-                    'certifications': certifications,
-                }
+        # Enrichir avec années d'expérience, niveau d'étude, soft skills, certifications
+        years_exp = extract_years_experience(text)
+        education = extract_education_level(text)
+        soft_skills = extract_soft_skills(text)
+        certifications = extract_certifications(text)
 
-            logger.info('Analyse terminée pour le CV : %s', cv.get('name') if isinstance(cv, dict) else str(cv))
+        # Stocker les résultats
+        cv['analysis'] = {
+            'skills': skills,
+            'experiences': experiences,
+            'years_experience': years_exp,
+            'education': education,
+            'soft_skills': soft_skills,
+            'certifications': certifications,
+        }
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                dump_json(cv['analysis'], cache_file, fsync=False)
+            except Exception as e:
+                logger.warning('Failed to write CV analysis cache: %s', e)
+
+        logger.info('Analyse terminée pour le CV : %s', cv.get('name'))
+
+    def _analysis_cache_file(self, path):
+        """Fichier de cache de l'analyse d'un PDF (None si le fichier est illisible)"""
+        try:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read())
+        except OSError:
+            return None
+        digest.update(f"|{self.model_name}|{ANALYSIS_VERSION}".encode('utf-8'))
+        return ANALYSIS_CACHE_DIR / f"{digest.hexdigest()}.json"
 
     def extract_pdf_text(self, pdf_path):
         """Safely extract text from PDF using guards."""
@@ -126,79 +277,43 @@ class CVAnalyzer:
     def identify_skills(self, word_counts):
         """Identifie les compétences techniques et outils dans le texte du CV"""
         
-        # Liste exhaustive de compétences techniques recherchées
-        tech_skills = {
-            # Langages de programmation
-            'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust', 'kotlin', 'swift', 'scala', 'r',
-            
-            # Bases de données
-            'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'sqlite', 'redis', 'cassandra', 'dynamodb', 'mariadb',
-            
-            # Outils BI et Data
-            'power bi', 'powerbi', 'tableau', 'looker', 'qlik', 'excel', 'dax', 'power query',
-            
-            # Machine Learning / AI
-            'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'scikit-learn', 'keras', 'nlp', 'computer vision',
-            
-            # Data Science
-            'pandas', 'numpy', 'scipy', 'matplotlib', 'seaborn', 'plotly', 'jupyter',
-            
-            # Big Data / ETL
-            'spark', 'hadoop', 'airflow', 'kafka', 'etl', 'data pipeline', 'databricks',
-            
-            # Cloud
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform',
-            
-            # Web
-            'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring',
-            
-            # Méthodologies
-            'agile', 'scrum', 'devops', 'ci/cd', 'git', 'jira',
-            
-            # Autres compétences techniques
-            'api', 'rest', 'graphql', 'microservices', 'data modeling', 'data visualization',
-            'business intelligence', 'data analysis', 'statistical analysis', 'data mining',
-            'reporting', 'dashboard', 'kpi', 'analytics'
-        }
-        
-        # Rechercher les compétences dans le texte
-        found_skills = []
-        text_lower = ' '.join(word_counts.keys()).lower()
-        
-        for skill in tech_skills:
-            # Recherche exacte ou partielle
-            if skill in text_lower or any(skill in word for word in word_counts.keys()):
-                found_skills.append(skill)
+        # Rechercher les compétences dans le texte (un seul passage pour toutes)
+        found_skills = _scan_tech_skills(' '.join(word_counts.keys()).lower())
+        found_set = set(found_skills)
         
         # Ajouter aussi les outils identifiés par NER si pertinents
         for word, count in word_counts.most_common(50):
             word_lower = word.lower()
             # Filtrer les mots qui ressemblent à des compétences techniques
             if (len(word) > 2 and 
-                word_lower not in ['data', 'pour', 'avec', 'dans', 'cette', 'vous', 'votre', 'notre'] and
+                word_lower not in _SKILL_NOISE_WORDS and
                 any(char.isupper() for char in word) or  # Mots avec majuscules (ex: PowerBI)
                 word_lower.endswith(('bi', 'sql', 'py')) or  # Suffixes techniques
                 count >= 3):  # Mentionné plusieurs fois
                 
-                if word_lower not in [s.lower() for s in found_skills]:
+                if word_lower not in found_set:
                     # Vérifier si c'est un acronyme ou un outil
                     if len(word) <= 10 and (word.isupper() or word[0].isupper()):
                         found_skills.append(word_lower)
+                        found_set.add(word_lower)
         
         # Retourner uniquement les compétences trouvées (minimum 5, maximum 25)
         return found_skills[:25] if found_skills else ['python', 'sql', 'data analysis']
 
-    def analyze_experiences(self, text):
+    def analyze_experiences(self, text, docs=None):
         # Cette méthode extrait les informations sur les expériences via NER
-        doc = self.nlp(text)
+        # (docs: résultats spaCy déjà calculés pour ce texte, sinon recalculés)
+        if docs is None:
+            docs = [self.nlp(text)]
         experiences = []
         # Labels pertinents à garder
         relevant_labels = {
             'PERSON', 'ORG', 'GPE', 'DATE', 'NORP', 'WORK_OF_ART', 'EVENT', 'PRODUCT', 'LANGUAGE'
         }
-        for ent in doc.ents:
-            if ent.label_ in relevant_labels:
-                experiences.append({'entity': ent.text, 'label': ent.label_})
+        for doc in docs:
+            for ent in doc.ents:
+                if ent.label_ in relevant_labels:
+                    experiences.append({'entity': ent.text, 'label': ent.label_})
         return experiences
 
     def get_all_skills(self):
@@ -207,10 +322,25 @@ class CVAnalyzer:
         Returns:
             list of unique skills from all CVs that have been analyzed
         """
-        all_skills = set()
-        for cv in self.cv_data:
-            if isinstance(cv, dict) and 'analysis' in cv:
-                analysis = cv['analysis']
-                if isinstance(analysis, dict) and 'skills' in analysis:
-                    all_skills.update(analysis['skills'])
-        return list(all_skills)
\ No newline at end of file
+        # Mémorisé jusqu'à la prochaine analyse (analyze_cvs / analyze_entry)
+        if self._all_skills_cache is None:
+            self._all_skills_cache = set().union(*(
+                cv['analysis']['skills'] for cv in self.cv_data
+                if isinstance(cv, dict) and isinstance(cv.get('analysis'), dict) and 'skills' in cv['analysis']
+            ))
+        return list(self._all_skills_cache)
+
+
+# Analyseur partagé (modèle spaCy chargé une seule fois par processus)
+_SINGLETON = None
+_SINGLETON_LOCK = threading.Lock()
+
+
+def get_analyzer():
+    """Retourne le CVAnalyzer partagé, créé au premier appel"""
+    global _SINGLETON
+    if _SINGLETON is None:
+        with _SINGLETON_LOCK:
+            if _SINGLETON is None:
+                _SINGLETON = CVAnalyzer([])
+    return _SINGLETON
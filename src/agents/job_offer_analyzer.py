@@ -59,6 +59,19 @@ class JobOfferAnalyzer:
         
         self.bert_model = bert_model
         self.analyzed_offers = []
+        self._offer_features = None
+
+    def precompute_offers(self):
+        """Extract the CV-independent data of every offer (required skills, requirements).
+
+        Can run while the CVs are still being analyzed; compare_job_offers then
+        only does the scoring. Called implicitly by compare_job_offers otherwise.
+        """
+        self._offer_features = [
+            self._offer_features_for(offer) if isinstance(offer, dict) else None
+            for offer in (self.job_offers or [])
+        ]
+        return self._offer_features
 
     def compare_job_offers(self, cv_skills=None, cv_data: List[Dict[str, Any]] = None):
         """Analyze and compare all job offers against candidate skills.
@@ -75,36 +88,56 @@ class JobOfferAnalyzer:
         
         logger.info(f'Comparing {len(self.job_offers)} job offer(s)')
         self.analyzed_offers = []
+
+        # CV side is the same for every offer: normalize it once for the whole batch
+        prepared = self._prepare_cv_side(cv_skills, cv_data)
+        features = self._offer_features
+        if features is None or len(features) != len(self.job_offers):
+            features = self.precompute_offers()
         
-        for offer in self.job_offers:
+        for offer, offer_features in zip(self.job_offers, features):
             if not isinstance(offer, dict):
                 logger.warning(f'Skipping invalid offer format: {offer}')
                 continue
             
-            analyzed = self._analyze_single_offer(offer, cv_skills, cv_data=cv_data)
+            analyzed = self._analyze_single_offer(
+                offer, cv_skills, cv_data=cv_data, prepared=prepared, features=offer_features
+            )
             self.analyzed_offers.append(analyzed)
         
         # Log summary
         high_matches = [o for o in self.analyzed_offers if o.get('match_score', 0) >= 0.7]
         logger.info(f'Job comparison complete: {len(high_matches)} offers with good match (score >= 0.7)')
 
-    def _analyze_single_offer(self, offer, cv_skills=None, cv_data: List[Dict[str, Any]] = None):
-        """Analyze a single job offer.
-        
-        Returns a dict with:
-        - offer data
-        - extracted_skills: list of required skills
-        - match_score: 0.0-1.0 similarity score
-        - matched_skills: list of matched skills
-        - ats_score: weighted score including years, education, location
+    def _prepare_cv_side(self, cv_skills=None, cv_data: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Precompute the offer-independent CV data used by the scoring helpers.
+
+        Returns a dict with the normalized CV skills (list and set), one
+        SequenceMatcher per CV skill (its second sequence is indexed once and
+        reused for every offer) and the lowercased skill set of each CV.
         """
+        cv_skills_lower = [s.lower().strip() for s in cv_skills] if cv_skills else []
+        matchers = []
+        for cv_skill in cv_skills_lower:
+            matcher = SequenceMatcher(None)
+            matcher.set_seq2(cv_skill)
+            matchers.append((cv_skill, matcher))
+        cv_skill_sets = [
+            self._cv_skill_set(cv, fallback_cv_skills=cv_skills) for cv in (cv_data or [])
+        ]
+        return {
+            'skills': cv_skills_lower,
+            'skill_set': set(cv_skills_lower),
+            'matchers': matchers,
+            'cv_skill_sets': cv_skill_sets,
+        }
+
+    def _offer_features_for(self, offer) -> Dict[str, Any]:
+        """CV-independent part of the analysis: normalized required skills and ATS requirements"""
         title = offer.get('title', 'Unknown')
-        company = offer.get('company', 'Unknown')
         description = offer.get('description', '')
         required_skills = offer.get('skills', [])
         
-        logger.debug(f'Analyzing offer: {title} at {company}')
-        
         # If no explicit skills provided, extract from title + description
         if not required_skills:
             required_skills = self._extract_skills_from_text(title + ' ' + description)
@@ -120,31 +153,57 @@ class JobOfferAnalyzer:
             else:
                 logger.debug(f'No skills extracted from "{title}"')
         
-        # Normalize skills (lowercase, strip whitespace)
-        required_skills = [s.lower().strip() for s in required_skills]
+        return {
+            # Normalize skills (lowercase, strip whitespace)
+            'required_skills': [s.lower().strip() for s in required_skills],
+            # ATS-style requirement extraction
+            'requirements': self._extract_requirements(offer),
+        }
+
+    def _analyze_single_offer(self, offer, cv_skills=None, cv_data: List[Dict[str, Any]] = None, prepared=None, features=None):
+        """Analyze a single job offer.
+        
+        Returns a dict with:
+        - offer data
+        - extracted_skills: list of required skills
+        - match_score: 0.0-1.0 similarity score
+        - matched_skills: list of matched skills
+        - ats_score: weighted score including years, education, location
+
+        `prepared` is the output of _prepare_cv_side and `features` the one of
+        _offer_features_for (both computed on demand if omitted).
+        """
+        if prepared is None:
+            prepared = self._prepare_cv_side(cv_skills, cv_data)
+        if features is None:
+            features = self._offer_features_for(offer)
+        title = offer.get('title', 'Unknown')
+        company = offer.get('company', 'Unknown')
+        description = offer.get('description', '')
+        required_skills = features['required_skills']
+        
+        logger.debug(f'Analyzing offer: {title} at {company}')
         
         # Calculate match score against CV skills
         match_score = 0.0
         matched_skills = []
         
         if cv_skills:
-            cv_skills_lower = [s.lower().strip() for s in cv_skills]
             matched_skills, match_score = self._calculate_skill_match(
-                required_skills, cv_skills_lower
+                required_skills, prepared['skills'], prepared=prepared
             )
         else:
             logger.debug(f'No CV skills provided for matching against {title}')
         
-        # ATS-style requirement extraction
-        requirements = self._extract_requirements(offer)
+        requirements = features['requirements']
 
         ats_score = None
         best_match_cv = None
         if cv_data:
             # pick best cv against this offer
             best_score = -1.0
-            for cv in cv_data:
-                score = self._score_offer(cv, offer, requirements, fallback_cv_skills=cv_skills)
+            for cv, cv_skill_set in zip(cv_data, prepared['cv_skill_sets']):
+                score = self._score_offer(cv, offer, requirements, fallback_cv_skills=cv_skills, cv_skills=cv_skill_set)
                 if score > best_score:
                     best_score = score
                     best_match_cv = cv
@@ -241,7 +300,7 @@ class JobOfferAnalyzer:
         
         return list(detected)
 
-    def _calculate_skill_match(self, required_skills, cv_skills):
+    def _calculate_skill_match(self, required_skills, cv_skills, prepared=None):
         """Calculate skill matching between required and available skills.
         
         Uses exact matches and fuzzy matching (SequenceMatcher) for similar skill names.
@@ -251,13 +310,16 @@ class JobOfferAnalyzer:
         """
         if not required_skills or not cv_skills:
             return [], 0.0
+        if prepared is None:
+            prepared = self._prepare_cv_side(cv_skills)
+        cv_skill_set = prepared['skill_set']
         
         matched = []
         match_count = 0
         
         for req_skill in required_skills:
             # Exact match
-            if req_skill in cv_skills:
+            if req_skill in cv_skill_set:
                 matched.append(req_skill)
                 match_count += 1
                 continue
@@ -266,8 +328,9 @@ class JobOfferAnalyzer:
             best_sim = 0.0
             best_cv_skill = None
             
-            for cv_skill in cv_skills:
-                similarity = SequenceMatcher(None, req_skill, cv_skill).ratio()
+            for cv_skill, matcher in prepared['matchers']:
+                matcher.set_seq1(req_skill)
+                similarity = matcher.ratio()
                 if similarity > best_sim and similarity >= 0.7:
                     best_sim = similarity
                     best_cv_skill = cv_skill
@@ -313,9 +376,14 @@ class JobOfferAnalyzer:
             'skill_hints': list(skill_hints),
         }
 
-    def _score_offer(self, cv: Dict[str, Any], offer: Dict[str, Any], reqs: Dict[str, Any], fallback_cv_skills=None) -> float:
+    def _cv_skill_set(self, cv: Dict[str, Any], fallback_cv_skills=None) -> set:
+        analysis = cv.get('analysis', {})
+        return set(map(str.lower, analysis.get('skills', cv.get('skills', fallback_cv_skills or []))))
+
+    def _score_offer(self, cv: Dict[str, Any], offer: Dict[str, Any], reqs: Dict[str, Any], fallback_cv_skills=None, cv_skills=None) -> float:
         analysis = cv.get('analysis', {})
-        cv_skills = set(map(str.lower, analysis.get('skills', cv.get('skills', fallback_cv_skills or []))))
+        if cv_skills is None:
+            cv_skills = self._cv_skill_set(cv, fallback_cv_skills=fallback_cv_skills)
         offer_skills = set(map(str.lower, offer.get('skills', []))) | set(reqs.get('skill_hints', []))
         # skills score
         common = cv_skills & offer_skills
@@ -1,5 +1,6 @@
 import logging
 import re
+from contextlib import nullcontext
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +25,15 @@ class NotificationAgent:
         self.min_match_score = min_match_score
         self.sent_notifications = []  # Track sent notifications to avoid duplicates
 
-    def send_notifications(self, recipient_email=None, force=False, generated_letters=None):
+    def send_notifications(self, recipient_email=None, force=False, generated_letters=None, min_match_score=None):
         """Send email notifications for matching job offers.
         
         Args:
             recipient_email: email address to send to; if None, read from env or skip
             force: if True, send even if already sent (for testing)
             generated_letters: dict of {offer_key: letter_text} for personalized letters
+            min_match_score: per-call threshold overriding self.min_match_score
+                (lets several recipients be notified concurrently)
         
         Returns:
             number of notifications sent
@@ -56,57 +59,160 @@ class NotificationAgent:
         if generated_letters is None:
             generated_letters = {}
 
+        if min_match_score is None:
+            min_match_score = self.min_match_score
+
         # Filter offers with good match
-        matched_offers = [
-            o for o in self.job_analyzer.analyzed_offers
-            if o.get('match_score', 0) >= self.min_match_score
-        ]
+        matched_offers = self._matching_offers(min_match_score)
 
         if not matched_offers:
-            logger.debug(f'No offers with match_score >= {self.min_match_score}; no notifications to send')
+            logger.debug(f'No offers with match_score >= {min_match_score}; no notifications to send')
             return 0
 
         sent_count = 0
-        for offer in matched_offers:
-            offer_key = f"{offer['title']}_{offer['company']}"
-
-            # Skip if already sent (unless force=True)
-            if offer_key in self.sent_notifications and not force:
-                logger.debug(f'Notification already sent for "{offer_key}"; skipping')
-                continue
-
-            # Build and send email (include motivation letter if available)
-            try:
-                subject = self._build_subject(offer)
-                motivation_letter = generated_letters.get(offer_key)
-                body = self._build_email_body(offer, motivation_letter=motivation_letter)
-
-                # If there's a motivation letter, generate a PDF attachment
-                attachments = None
-                if motivation_letter:
-                    try:
-                        from utils.pdf_generator import create_pdf_bytes
-                        pdf_bytes = create_pdf_bytes(motivation_letter, title=f"Lettre de motivation - {offer['title']}")
-                        filename = f"Lettre_{offer['title'].replace(' ', '_')}_{offer['company'].replace(' ', '_')}.pdf"
-                        attachments = [(filename, pdf_bytes, 'application/pdf')]
-                    except Exception as e:
-                        logger.warning(f'Failed to generate PDF attachment for {offer_key}: {e}')
-
-                self.email_sender.send_email(recipient_email, subject, body, attachments=attachments)
-
-                self.sent_notifications.append(offer_key)
-                sent_count += 1
-
-                logger.info(
-                    f'Notification sent for "{offer["title"]}" at {offer["company"]} '
-                    f'({int(offer["match_score"] * 100)}% match) to {recipient_email}'
-                )
-            except Exception as e:
-                logger.warning(f'Failed to send notification for "{offer_key}": {e}')
+        # One SMTP connection for every email of this batch (no-op if the
+        # caller already opened a session)
+        session = getattr(self.email_sender, 'session', None)
+        with session() if session else nullcontext():
+            for offer in matched_offers:
+                offer_key = f"{offer['title']}_{offer['company']}"
+
+                # Skip if already sent (unless force=True)
+                if offer_key in self.sent_notifications and not force:
+                    logger.debug(f'Notification already sent for "{offer_key}"; skipping')
+                    continue
+
+                # Build and send email (include motivation letter if available)
+                try:
+                    subject = self._build_subject(offer)
+                    motivation_letter = generated_letters.get(offer_key)
+                    body = self._build_email_body(offer, motivation_letter=motivation_letter)
+
+                    # If there's a motivation letter, generate a PDF attachment
+                    attachment = self._letter_attachment(offer, motivation_letter)
+                    attachments = [attachment] if attachment else None
+
+                    self.email_sender.send_email(recipient_email, subject, body, attachments=attachments)
+
+                    self.sent_notifications.append(offer_key)
+                    sent_count += 1
+
+                    logger.info(
+                        f'Notification sent for "{offer["title"]}" at {offer["company"]} '
+                        f'({int(offer["match_score"] * 100)}% match) to {recipient_email}'
+                    )
+                except Exception as e:
+                    logger.warning(f'Failed to send notification for "{offer_key}": {e}')
 
         logger.info(f'Notifications: {sent_count} sent out of {len(matched_offers)} matching offers')
         return sent_count
 
+    def send_digest(self, recipient_email, offers=None, generated_letters=None, min_match_score=None):
+        """Send all matching offers to one recipient in a single email.
+
+        Same selection as send_notifications (always forced), but one message
+        lists every offer and carries every motivation letter as a PDF
+        attachment, instead of one email per offer.
+
+        Args:
+            recipient_email: email address to send to
+            offers: analyzed offers to include; defaults to the analyzer's
+                offers with match_score >= min_match_score
+            generated_letters: dict of {offer_key: letter_text}
+            min_match_score: per-call threshold overriding self.min_match_score
+
+        Returns:
+            number of offers included in the digest (0 if nothing was sent)
+        """
+        if not recipient_email or not self._is_valid_email(recipient_email):
+            logger.warning(f'Invalid email address format: {recipient_email}; skipping digest')
+            return 0
+
+        if generated_letters is None:
+            generated_letters = {}
+        if min_match_score is None:
+            min_match_score = self.min_match_score
+        if offers is None:
+            offers = self._matching_offers(min_match_score)
+        if not offers:
+            logger.debug(f'No offers with match_score >= {min_match_score}; no digest to send')
+            return 0
+
+        attachments = []
+        for offer in offers:
+            attachment = self._letter_attachment(offer, generated_letters.get(f"{offer['title']}_{offer['company']}"))
+            if attachment:
+                attachments.append(attachment)
+
+        best = max(offers, key=lambda o: o.get('match_score', 0))
+        subject = (
+            f"{len(offers)} nouvelle(s) offre(s) - jusqu'à {int(best.get('match_score', 0) * 100)}% - {best['title']}"
+        )
+        try:
+            self.email_sender.send_email(
+                recipient_email, subject, self._build_digest_body(offers), attachments=attachments or None
+            )
+        except Exception as e:
+            logger.warning(f'Failed to send digest to {recipient_email}: {e}')
+            return 0
+
+        self.sent_notifications.extend(f"{o['title']}_{o['company']}" for o in offers)
+        logger.info(f'Digest with {len(offers)} offer(s) sent to {recipient_email}')
+        return len(offers)
+
+    def _matching_offers(self, min_match_score):
+        """Analyzed offers whose match_score reaches the threshold."""
+        return [
+            o for o in self.job_analyzer.analyzed_offers
+            if o.get('match_score', 0) >= min_match_score
+        ]
+
+    def _letter_attachment(self, offer, motivation_letter):
+        """Render a motivation letter as a PDF attachment tuple, or None."""
+        if not motivation_letter:
+            return None
+        try:
+            from utils.pdf_generator import create_pdf_bytes
+            pdf_bytes = create_pdf_bytes(motivation_letter, title=f"Lettre de motivation - {offer['title']}")
+            filename = f"Lettre_{offer['title'].replace(' ', '_')}_{offer['company'].replace(' ', '_')}.pdf"
+            return (filename, pdf_bytes, 'application/pdf')
+        except Exception as e:
+            logger.warning(f"Failed to generate PDF attachment for {offer['title']}_{offer['company']}: {e}")
+            return None
+
+    def _build_digest_body(self, offers):
+        """Build the digest body: one short section per offer, best matches first."""
+        sections = []
+        for offer in sorted(offers, key=lambda o: o.get('match_score', 0), reverse=True):
+            matched_skills = offer.get('matched_skills', [])
+            required_skills = offer.get('required_skills', [])
+            section = f"""📋 {offer['title']} — {offer['company']}
+📊 Taux de correspondance : {int(offer.get('match_score', 0) * 100)}%"""
+            offer_url = offer.get('url', offer.get('link', ''))
+            if offer_url:
+                section += f"""
+🔗 Postuler : {offer_url}"""
+            section += f"""
+✅ Compétences correspondantes ({len(matched_skills)}/{len(required_skills)}) : {', '.join(matched_skills) if matched_skills else 'Aucune correspondance'}"""
+            sections.append(section)
+
+        body = f"""Bonjour,
+
+Nous avons trouvé {len(offers)} opportunité(s) qui correspondent à votre profil :
+
+"""
+        body += '\n\n'.join(sections)
+        body += """
+
+Les lettres de motivation personnalisées, lorsqu'elles sont disponibles, sont jointes en PDF.
+
+Cordialement,
+L'équipe Agent_CV
+
+---
+Ceci est une notification automatique."""
+        return body
+
     def _build_subject(self, offer):
         """Build email subject line."""
         match_percent = int(offer['match_score'] * 100)
@@ -1,11 +1,11 @@
 import os
 import logging
-import json
 from agents.cv_analyzer import CVAnalyzer
 from agents.job_offer_analyzer import JobOfferAnalyzer
 from agents.motivation_letter_generator import MotivationLetterGenerator
 from agents.notification_agent import NotificationAgent
 from utils.email_sender import EmailSender
+from utils.json_io import load_json
 from utils.adzuna_api import fetch_from_adzuna
 from utils.job_fetcher import filter_offers_by_title_and_location
 from dotenv import load_dotenv
@@ -32,8 +32,7 @@ def get_test_data():
     def _load_json(filename):
         path = os.path.join(base_dir, filename)
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_json(path)
         except FileNotFoundError:
             logger.debug(f'Fichier non trouvé: {path}')
             return None
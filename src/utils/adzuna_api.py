@@ -1,6 +1,10 @@
 from __future__ import annotations
 import os
+import time
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import List, Dict, Any
 from urllib.parse import urlencode
 
@@ -11,6 +15,43 @@ try:
 except ImportError:
     requests = None
 
+try:
+    from .json_io import load_json, dump_json
+except ImportError:
+    from json_io import load_json, dump_json
+
+# Cache disque des réponses (partagé entre run_once_notify et scheduler)
+CACHE_DIR = Path(__file__).resolve().parents[2] / 'logs'
+CACHE_TTL = int(os.environ.get('ADZUNA_CACHE_TTL', 3600))
+
+
+# Adzuna renvoie au plus 50 offres par page; les pages suivantes sont
+# demandées en parallèle (même session HTTP, connexions réutilisées)
+PAGE_SIZE = 50
+MAX_PAGE_WORKERS = 5
+
+
+def _parse_offer(item: Dict[str, Any], location: str) -> Dict[str, Any]:
+    return {
+        'title': item.get('title', 'N/A'),
+        'company': item.get('company', {}).get('display_name', 'N/A'),
+        'location': item.get('location', {}).get('display_name', location),
+        'description': item.get('description', ''),
+        'url': item.get('redirect_url', ''),
+        'source': 'adzuna.com',
+        'created': item.get('created', ''),
+        'salary_min': item.get('salary_min'),
+        'salary_max': item.get('salary_max'),
+        'contract_type': item.get('contract_type', '')
+    }
+
+
+def _fetch_page(session, country: str, page: int, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Format: https://api.adzuna.com/v1/api/jobs/{country}/search/{page}
+    response = session.get(f"https://api.adzuna.com/v1/api/jobs/{country}/search/{page}", params=params, timeout=15)
+    response.raise_for_status()
+    return response.json().get('results', [])
+
 
 def fetch_from_adzuna(keywords: str = "data analyst OR data scientist",
                       location: str = "Paris",
@@ -26,46 +67,29 @@ def fetch_from_adzuna(keywords: str = "data analyst OR data scientist",
     if not app_id or not app_key:
         raise RuntimeError("ADZUNA_APP_ID and ADZUNA_APP_KEY must be set in environment")
     
-    # Adzuna API endpoint
-    # Format: https://api.adzuna.com/v1/api/jobs/{country}/search/{page}
-    base_url = f"https://api.adzuna.com/v1/api/jobs/{country}/search/1"
-    
     params = {
         'app_id': app_id,
         'app_key': app_key,
         'what': keywords,
         'where': location,
-        'results_per_page': min(max_results, 50), 
+        'results_per_page': min(max_results, PAGE_SIZE), 
         'content-type': 'application/json'
     }
+    pages = range(1, max(1, -(-max_results // PAGE_SIZE)) + 1)
     
     try:
         logger.info(f"Fetching jobs from Adzuna: {keywords} in {location}")
-        response = requests.get(base_url, params=params, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
+        with requests.Session() as session:
+            if len(pages) == 1:
+                page_results = [_fetch_page(session, country, 1, params)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(MAX_PAGE_WORKERS, len(pages))) as executor:
+                    page_results = list(executor.map(lambda page: _fetch_page(session, country, page, params), pages))
         
-        # Parse results
-        offers = []
-        results = data.get('results', [])
-        
-        for item in results:
-            offer = {
-                'title': item.get('title', 'N/A'),
-                'company': item.get('company', {}).get('display_name', 'N/A'),
-                'location': item.get('location', {}).get('display_name', location),
-                'description': item.get('description', ''),
-                'url': item.get('redirect_url', ''),
-                'source': 'adzuna.com',
-                'created': item.get('created', ''),
-                'salary_min': item.get('salary_min'),
-                'salary_max': item.get('salary_max'),
-                'contract_type': item.get('contract_type', '')
-            }
-            if len(offers) == 0:
-                logger.debug(f"First offer description length: {len(offer['description'])} chars")
-            offers.append(offer)
+        # Parse results (pages dans l'ordre)
+        offers = [_parse_offer(item, location) for results in page_results for item in results][:max_results]
+        if offers:
+            logger.debug(f"First offer description length: {len(offers[0]['description'])} chars")
         
         logger.info(f"Fetched {len(offers)} offers from Adzuna")
         return offers
@@ -82,6 +106,42 @@ def fetch_from_adzuna(keywords: str = "data analyst OR data scientist",
         raise
 
 
+def fetch_from_adzuna_cached(keywords: str = "data analyst OR data scientist",
+                             location: str = "Paris",
+                             max_results: int = 50,
+                             country: str = "fr",
+                             ttl: int = CACHE_TTL) -> List[Dict[str, Any]]:
+    """fetch_from_adzuna avec cache disque par heure (logs/adzuna_<clé>.json)
+
+    Les offres Adzuna changent peu d'une heure à l'autre: les exécutions
+    rapprochées réutilisent la dernière réponse au lieu de rappeler l'API.
+    """
+    bucket = int(time.time() // 3600)
+    key = hashlib.md5(f"{keywords}|{location}|{max_results}|{country}|{bucket}".encode('utf-8')).hexdigest()
+    cache_file = CACHE_DIR / f"adzuna_{key}.json"
+    try:
+        if time.time() - cache_file.stat().st_mtime < ttl:
+            offers = load_json(cache_file)
+            logger.info(f"Using {len(offers)} cached Adzuna offers ({cache_file.name})")
+            return offers
+    except OSError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable Adzuna cache {cache_file.name}: {e}")
+
+    offers = fetch_from_adzuna(keywords=keywords, location=location, max_results=max_results, country=country)
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        dump_json(offers, cache_file)
+        # TTL par défaut au minimum: un appel à TTL court n'efface pas le cache des autres
+        for old in CACHE_DIR.glob('adzuna_*.json'):
+            if old != cache_file and time.time() - old.stat().st_mtime >= max(ttl, CACHE_TTL):
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning(f"Failed to write Adzuna cache: {e}")
+    return offers
+
+
 def test_adzuna_connection() -> bool:
     try:
         offers = fetch_from_adzuna(keywords="data", location="Paris", max_results=1)
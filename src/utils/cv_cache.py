@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Cache disque des analyses de CV, partagé par run_once_notify et scheduler
+
+Les analyses (une par entrée de cv_data) sont stockées dans
+logs/cv_cache_<clé>.pkl, la clé étant calculée sur le contenu des PDF, le
+modèle spaCy et ANALYSIS_VERSION: un run sur des CV inchangés (quel que soit
+le script) ne recharge pas spaCy. Le module n'importe pas spaCy, d'où la
+définition ici de ANALYSIS_VERSION (réexportée par agents.cv_analyzer).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_DIR = ROOT / 'logs'
+# À incrémenter quand l'extraction change (invalide les caches d'analyse)
+ANALYSIS_VERSION = 3
+
+
+def spacy_model_name(spacy_model=None):
+    """Nom du modèle spaCy: celui d'un modèle chargé (meta), sinon le nom demandé"""
+    if spacy_model and hasattr(spacy_model, 'pipe'):
+        meta = getattr(spacy_model, 'meta', None) or {}
+        return f"{meta.get('lang', '')}_{meta.get('name', '')}-{meta.get('version', '')}"
+    return spacy_model or os.environ.get('SPACY_MODEL', 'fr_core_news_sm')
+
+
+class CachedCVAnalysis:
+    """CV déjà analysés relus depuis le cache (ce qu'utilisent les agents en aval)"""
+
+    def __init__(self, cv_data):
+        self.cv_data = cv_data
+
+    def get_all_skills(self):
+        return list(set().union(*(
+            cv['analysis'].get('skills') or () for cv in self.cv_data
+            if isinstance(cv, dict) and isinstance(cv.get('analysis'), dict)
+        )))
+
+
+def cv_cache_key(cv_data, spacy_model=None):
+    """Clé sur le contenu des PDF (pas le nom de fichier), les analyses existantes,
+    le modèle spaCy et ANALYSIS_VERSION"""
+    parts = [[spacy_model_name(spacy_model), ANALYSIS_VERSION]]
+    for cv in cv_data:
+        if not isinstance(cv, dict):
+            parts.append([str(cv), None])
+            continue
+        path = cv.get('path') or ''
+        digest = path
+        for candidate in (Path(path), ROOT / path):
+            if path and candidate.is_file():
+                digest = hashlib.sha256(candidate.read_bytes()).hexdigest()
+                break
+        parts.append([digest, cv.get('analysis')])
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def analyze_cvs_cached(cv_data, spacy_model=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Analyse les CV, ou relit le résultat d'un run précédent sur les mêmes CV
+
+    Retourne le CVAnalyzer utilisé, ou un CachedCVAnalysis si le cache a servi.
+    """
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"cv_cache_{cv_cache_key(cv_data, spacy_model)}.pkl"
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                analyses = pickle.load(f)
+            for cv, analysis in zip(cv_data, analyses):
+                if isinstance(cv, dict) and analysis is not None:
+                    cv['analysis'] = analysis
+            logger.info(f"Loaded CV analysis from cache {cache_file.name}")
+            return CachedCVAnalysis(cv_data)
+        except Exception as e:
+            logger.warning(f"Failed to read CV analysis cache: {e}")
+
+    # Import tardif: spaCy n'est chargé qu'en cas d'analyse réelle
+    from agents.cv_analyzer import CVAnalyzer
+
+    cv_analyzer = CVAnalyzer(cv_data, spacy_model)
+    cv_analyzer.analyze_cvs()
+
+    try:
+        analyses = [cv.get('analysis') if isinstance(cv, dict) else None for cv in cv_analyzer.cv_data]
+        cache_dir.mkdir(exist_ok=True)
+        # Fichier temporaire propre au processus: les deux scripts peuvent écrire en même temps
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(analyses, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+        # Un seul cache conservé: les anciennes clés ne resserviront pas
+        for old in cache_dir.glob('cv_cache_*.pkl'):
+            if old != cache_file:
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning(f"Failed to write CV analysis cache: {e}")
+    return cv_analyzer
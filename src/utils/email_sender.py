@@ -1,6 +1,8 @@
 import os
 import smtplib
 import base64
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -19,6 +21,12 @@ except ImportError:
 class EmailSender:
     
     def __init__(self):
+        # Connexions SMTP libres, ouvertes à la demande pendant session():
+        # chaque envoi en prend une (ou en ouvre une) puis la rend, donc des
+        # envois en parallèle utilisent chacun leur propre connexion
+        self._idle_smtp = []
+        self._smtp_lock = threading.Lock()
+        self._session_active = False
         self.sendgrid_enabled = os.environ.get('SENDGRID', 'false').lower() == 'true'
         
         if self.sendgrid_enabled:
@@ -40,6 +48,41 @@ class EmailSender:
             self.sender_email = os.environ.get('EMAIL_SENDER')
             self.password = os.environ.get('EMAIL_PASSWORD')
 
+    @contextmanager
+    def session(self):
+        """Réutilise les connexions SMTP pour tous les envois du bloc with
+
+        Hors session, chaque email ouvre sa propre connexion (STARTTLS + login).
+        """
+        if self.sendgrid_enabled or self._session_active:
+            yield self
+            return
+        self._session_active = True
+        try:
+            yield self
+        finally:
+            self._session_active = False
+            self._close_smtp()
+
+    def _connect_smtp(self):
+        server = smtplib.SMTP(self.smtp_server, self.port)
+        try:
+            server.starttls()
+            server.login(self.sender_email, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _close_smtp(self):
+        with self._smtp_lock:
+            idle, self._idle_smtp = self._idle_smtp, []
+        for server in idle:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
     def send_email(self, recipient, subject, body, attachments=None):
 
         test_mode = os.environ.get('EMAIL_TEST_MODE', 'false').lower() == 'true'
@@ -77,10 +120,26 @@ class EmailSender:
                 part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
                 message.attach(part)
 
-        with smtplib.SMTP(self.smtp_server, self.port) as server:
-            server.starttls()
-            server.login(self.sender_email, self.password)
-            server.send_message(message)
+        if not self._session_active:
+            with self._connect_smtp() as server:
+                server.send_message(message)
+            return True
+
+        with self._smtp_lock:
+            server = self._idle_smtp.pop() if self._idle_smtp else None
+        if server is None:
+            server = self._connect_smtp()
+        try:
+            try:
+                server.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # Connexion fermée côté serveur (inactivité): reconnexion unique
+                server.close()
+                server = self._connect_smtp()
+                server.send_message(message)
+        finally:
+            with self._smtp_lock:
+                self._idle_smtp.append(server)
         return True
 
     def _send_via_sendgrid(self, recipient, subject, body, attachments=None):
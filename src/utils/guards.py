@@ -47,8 +47,11 @@ def check_api_key(api_key, key_name='API Key', min_length=10):
     return True
 
 
-def safe_extract_pdf_text(pdf_path, fallback_text=""):
-    """Extrait le texte d'un PDF avec gestion d'erreur"""
+def safe_extract_pdf_text(pdf_path, fallback_text="", pages=None):
+    """Extrait le texte d'un PDF avec gestion d'erreur
+
+    pages: indices des pages à extraire (ex. (0,) pour la première), toutes par défaut
+    """
     if not check_file_exists(pdf_path, "PDF file"):
         return fallback_text
     
@@ -56,10 +59,11 @@ def safe_extract_pdf_text(pdf_path, fallback_text=""):
         import PyPDF2
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text
+            if pages is None:
+                selected = reader.pages
+            else:
+                selected = [reader.pages[i] for i in pages if i < len(reader.pages)]
+            text = "".join(page.extract_text() or "" for page in selected)
         
         if text.strip():
             logger.debug(f'Extracted {len(text)} chars from {pdf_path}')
@@ -71,3 +75,24 @@ def safe_extract_pdf_text(pdf_path, fallback_text=""):
     except Exception as e:
         logger.warning(f'Failed to extract PDF text from {pdf_path}: {e}')
         return fallback_text
+
+
+def iter_pdf_pages(pdf_path):
+    """Produit le texte de chaque page non vide d'un PDF, au fil de l'extraction
+
+    Permet de traiter les premières pages pendant que les suivantes sont
+    extraites; ne produit rien si le fichier est absent ou illisible.
+    """
+    if not check_file_exists(pdf_path, "PDF file"):
+        return
+    
+    try:
+        import PyPDF2
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            for page in reader.pages:
+                text = page.extract_text() or ""
+                if text.strip():
+                    yield text
+    except Exception as e:
+        logger.warning(f'Failed to extract PDF text from {pdf_path}: {e}')
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Relève des offres Adzuna partagée par run_once_notify et scheduler
+
+Récupère les offres (cache disque Adzuna), les filtre par titre et
+localisation, puis les enregistre pour l'UI Streamlit (job_offers.json) et
+en base si elle est disponible.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+# Optional DB imports (les scripts ajoutent la racine du projet au sys.path)
+try:
+    from db.session import engine, get_session
+    from db.models import JobOffer as JobOfferModel
+    from sqlalchemy import insert, select
+    DB_AVAILABLE = True
+except Exception:
+    DB_AVAILABLE = False
+
+from .adzuna_api import CACHE_TTL, fetch_from_adzuna_cached
+from .job_fetcher import filter_offers_by_title_and_location
+from .json_io import dump_json
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+JOB_OFFERS_FILE = ROOT / 'src' / 'data' / 'job_offers.json'
+DEFAULT_TITLES = ['data analyst', 'data scientist']
+# Au-delà de 50, plusieurs pages Adzuna (récupérées en parallèle)
+MAX_RESULTS = int(os.environ.get('ADZUNA_MAX_RESULTS', 50))
+
+
+def _offer_insert():
+    """INSERT de JobOffer ignorant les URL déjà présentes, None si non supporté"""
+    if engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(JobOfferModel).on_conflict_do_nothing(index_elements=['url'])
+
+
+def save_offers_to_db(offers):
+    """Insère en base les offres dont l'URL n'y est pas encore; retourne le nombre envoyé
+
+    Une seule transaction et un INSERT multi-lignes; avec ON CONFLICT (SQLite,
+    PostgreSQL) la base écarte elle-même les doublons, sinon les URL déjà
+    connues sont lues en une requête IN.
+    """
+    if not DB_AVAILABLE or not offers:
+        return 0
+    urls = [o.get('url') for o in offers if o.get('url')]
+    if not urls:
+        return 0
+    with get_session() as session, session.begin():
+        offer_insert = _offer_insert()
+        if offer_insert is None:
+            offer_insert = insert(JobOfferModel)
+            known_urls = set(session.execute(
+                select(JobOfferModel.url).where(JobOfferModel.url.in_(urls))
+            ).scalars())
+        else:
+            known_urls = set()
+        rows = []
+        for o in offers:
+            url = o.get('url') or ''
+            if not url or url in known_urls:
+                continue
+            known_urls.add(url)
+            # Tronquer seulement si nécessaire (évite une copie de la chaîne)
+            description = o.get('description') or ''
+            if len(description) > 3900:
+                description = description[:3900]
+            rows.append(dict(
+                title=o.get('title',''),
+                company=o.get('company',''),
+                description=description,
+                url=url,
+                source=o.get('source',''),
+                created=o.get('created',''),
+                requirements=o.get('requirements') or {},
+                extracted_skills=o.get('skills') or [],
+            ))
+        if rows:
+            session.execute(offer_insert, rows)
+    return len(rows)
+
+
+def fetch_and_persist_offers(titles=None, location=None, max_results=MAX_RESULTS, job_file=JOB_OFFERS_FILE,
+                             save_to_db=True, cache_ttl=CACHE_TTL):
+    """Récupère, filtre et enregistre (JSON + DB) les offres Adzuna
+
+    La localisation vaut par défaut JOB_LOCATION (ou 'paris'). Avec
+    save_to_db=False l'appelant écrit lui-même en base (par ex. seulement les
+    offres nouvelles). cache_ttl est la durée de validité (s) du cache disque
+    Adzuna. Retourne les offres filtrées, ou [] si la relève échoue.
+    """
+    titles = titles or DEFAULT_TITLES
+    location = location or os.environ.get('JOB_LOCATION', 'paris')
+    try:
+        logger.info('Fetching job offers from Adzuna API')
+        offers = fetch_from_adzuna_cached(keywords=' OR '.join(titles), location=location, max_results=max_results,
+                                          ttl=cache_ttl)
+        filtered = filter_offers_by_title_and_location(offers, titles, location)
+    except Exception as e:
+        logger.error(f'Failed to fetch Adzuna offers: {e}')
+        return []
+    logger.info(f'Fetched {len(offers)} offers, {len(filtered)} after filtering')
+    if not filtered:
+        return []
+
+    # Sauvegarder pour l'UI Streamlit
+    try:
+        dump_json(filtered, job_file)
+        logger.info(f'Saved {len(filtered)} offers to {job_file}')
+    except Exception as e:
+        logger.warning(f'Failed to save offers to {Path(job_file).name}: {e}')
+
+    if not save_to_db:
+        return filtered
+    try:
+        added = save_offers_to_db(filtered)
+        if DB_AVAILABLE:
+            logger.info(f'Sent {added} offers to DB (existing URLs skipped)')
+    except Exception as e:
+        logger.warning(f'Failed to save offers to DB: {e}')
+    return filtered
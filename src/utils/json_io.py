@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture / écriture des fichiers JSON de données (cv_data, offres, historique...)
+
+Utilise orjson s'il est installé (parse et sérialisation bien plus rapides,
+directement sur les octets du fichier), sinon le module json standard.
+Le format écrit est le même dans les deux cas: indentation de 2 espaces,
+UTF-8 sans échappement des accents, retour à la ligne final.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Décode un document JSON (bytes ou str)"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> bytes:
+    """Encode un objet en JSON indenté (UTF-8); les types inconnus passent par str()"""
+    if orjson:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, indent=2, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+def load_json(path):
+    """Charge un fichier JSON"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_json(obj, path, fsync=True):
+    """Écrit un objet dans un fichier JSON de façon atomique
+
+    Le contenu est écrit dans un fichier temporaire voisin puis renommé: un
+    lecteur ne voit jamais un fichier à moitié écrit. Avec fsync=True le
+    fichier est aussi synchronisé sur disque avant le renommage; les chemins
+    d'écriture fréquents passent fsync=False et appellent fsync_file à l'arrêt.
+    Le fichier temporaire est propre au processus et au thread, de sorte que
+    deux écritures simultanées du même fichier ne se marchent pas dessus.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps(obj))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def fsync_file(path):
+    """Force l'écriture sur disque d'un fichier (ignoré s'il n'existe pas)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
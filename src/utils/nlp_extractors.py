@@ -9,8 +9,58 @@ Lightweight regex + heuristics (language-agnostic FR/EN) to extract:
 """
 
 import re
+from datetime import datetime
 from typing import Optional, List
 
+# Patterns compiled once at import (the extractors run for every CV and offer)
+_YEARS_RANGE_RE = re.compile(r"(\d+)\s*(?:-|à|to)\s*(\d+)\s*(?:ans?|years?)")
+_YEARS_EXPLICIT_RE = re.compile(r"\b(\d{1,2})\+?\s*(?:ans?|years?)\s*(?:d['’]?)?(?:expérience|experience)?\b")
+_SINCE_YEAR_RE = re.compile(r"\b(?:depuis|since)\s*(\d{4})\b")
+_YEARS_ANY_RE = re.compile(r"\b(\d{1,2})\s*years\b")
+
+_EDUCATION_RES = (
+    ('phd', re.compile(r"\b(phd|doctorat|docteur)\b")),
+    # Master / Engineer (bac+5)
+    ('master', re.compile(r"\b(master|msc|bac\+5|ingénieur|engineer)\b")),
+    # Bachelor / Licence (bac+3)
+    ('bachelor', re.compile(r"\b(licence|bachelor|bac\+3)\b")),
+    ('bac', re.compile(r"\b(baccalauréat|bac)\b")),
+)
+
+_SOFT_SKILL_KEYWORDS = {
+    'leadership': ['leadership', 'leader'],
+    'communication': ['communication', 'communicate', 'communiquer'],
+    'teamwork': ['teamwork', 'travail en équipe', 'collaboration'],
+    'problem solving': ['problem solving', 'résolution de problèmes'],
+    'adaptability': ['adaptabilité', 'adaptability', 'flexible'],
+    'creativity': ['créativité', 'creativity'],
+    'time management': ['gestion du temps', 'time management'],
+    'critical thinking': ['esprit critique', 'critical thinking'],
+    'ownership': ['autonomie', 'ownership'],
+}
+
+# One alternation per certification (any variant matches)
+_CERTIFICATION_RES = {
+    label: re.compile('|'.join(f'(?:{r})' for r in regs))
+    for label, regs in {
+        'aws certified': [r"aws\s+certified", r"certification\s+aws"],
+        'azure fundamentals': [r"azure\s+fundamentals", r"az-900"],
+        'azure data engineer': [r"dp-203", r"azure\s+data\s+engineer"],
+        'gcp data engineer': [r"gcp\s+data\s+engineer", r"professional\s+data\s+engineer"],
+        'power bi certification': [r"power\s*bi\s*certification", r"certified\s+power\s*bi"],
+        'tableau certification': [r"tableau\s+certified", r"tableau\s+desktop\s+specialist"],
+        'scrum master': [r"scrum\s+master", r"psm\s*i"],
+        'itil': [r"\bitil\b"],
+    }.items()
+}
+
+_SENIORITY_RES = (
+    ('principal', re.compile(r"\b(principal|distinguished|fellow)\b")),
+    ('lead', re.compile(r"\b(lead|chef|head\s+of|manager)\b")),
+    ('senior', re.compile(r"\b(senior|confirmé|expert|sr\.?|sen\.?)\b")),
+    ('junior', re.compile(r"\b(junior|débutant|jr\.?|graduate)\b")),
+)
+
 
 def extract_years_experience(text: str) -> Optional[float]:
     """Extract years of experience from free text.
@@ -28,24 +78,23 @@ def extract_years_experience(text: str) -> Optional[float]:
     t = text.lower()
 
     # Range like "2 à 4 ans" or "2-4 years"
-    m = re.search(r"(\d+)\s*(?:-|à|to)\s*(\d+)\s*(?:ans?|years?)", t)
+    m = _YEARS_RANGE_RE.search(t)
     if m:
         a, b = int(m.group(1)), int(m.group(2))
         return round((a + b) / 2, 1)
 
     # Explicit years experience (FR/EN)
-    m = re.search(r"\b(\d{1,2})\+?\s*(?:ans?|years?)\s*(?:d['’]?)?(?:expérience|experience)?\b", t)
+    m = _YEARS_EXPLICIT_RE.search(t)
     if m:
         val = float(m.group(1))
         if 0 <= val <= 60:
             return val
 
     # Since year -> compute delta
-    m = re.search(r"\b(?:depuis|since)\s*(\d{4})\b", t)
+    m = _SINCE_YEAR_RE.search(t)
     if m:
         try:
             start_year = int(m.group(1))
-            from datetime import datetime
             years = datetime.now().year - start_year
             if years >= 0:
                 return float(years)
@@ -53,7 +102,7 @@ def extract_years_experience(text: str) -> Optional[float]:
             pass
 
     # Fallback: any "X years" occurrences
-    m = re.search(r"\b(\d{1,2})\s*years\b", t)
+    m = _YEARS_ANY_RE.search(t)
     if m:
         val = float(m.group(1))
         if 0 <= val <= 60:
@@ -71,18 +120,10 @@ def extract_education_level(text: str) -> str:
         return 'none'
     t = text.lower()
 
-    # PhD
-    if re.search(r"\b(phd|doctorat|docteur)\b", t):
-        return 'phd'
-    # Master / Engineer (bac+5)
-    if re.search(r"\b(master|msc|bac\+5|ingénieur|engineer)\b", t):
-        return 'master'
-    # Bachelor / Licence (bac+3)
-    if re.search(r"\b(licence|bachelor|bac\+3)\b", t):
-        return 'bachelor'
-    # Bac
-    if re.search(r"\b(baccalauréat|bac)\b", t):
-        return 'bac'
+    # Highest level first
+    for level, pattern in _EDUCATION_RES:
+        if pattern.search(t):
+            return level
     return 'none'
 
 
@@ -94,24 +135,10 @@ def extract_soft_skills(text: str) -> List[str]:
     if not text:
         return []
     t = text.lower()
-    keywords = {
-        'leadership': ['leadership', 'leader'],
-        'communication': ['communication', 'communicate', 'communiquer'],
-        'teamwork': ['teamwork', 'travail en équipe', 'collaboration'],
-        'problem solving': ['problem solving', 'résolution de problèmes'],
-        'adaptability': ['adaptabilité', 'adaptability', 'flexible'],
-        'creativity': ['créativité', 'creativity'],
-        'time management': ['gestion du temps', 'time management'],
-        'critical thinking': ['esprit critique', 'critical thinking'],
-        'ownership': ['autonomie', 'ownership'],
-    }
-    found = set()
-    for label, variants in keywords.items():
-        for v in variants:
-            if v in t:
-                found.add(label)
-                break
-    return list(found)
+    return list({
+        label for label, variants in _SOFT_SKILL_KEYWORDS.items()
+        if any(v in t for v in variants)
+    })
 
 
 def extract_certifications(text: str) -> List[str]:
@@ -122,23 +149,7 @@ def extract_certifications(text: str) -> List[str]:
     if not text:
         return []
     t = text.lower()
-    patterns = {
-        'aws certified': [r"aws\s+certified", r"certification\s+aws"],
-        'azure fundamentals': [r"azure\s+fundamentals", r"az-900"],
-        'azure data engineer': [r"dp-203", r"azure\s+data\s+engineer"],
-        'gcp data engineer': [r"gcp\s+data\s+engineer", r"professional\s+data\s+engineer"],
-        'power bi certification': [r"power\s*bi\s*certification", r"certified\s+power\s*bi"],
-        'tableau certification': [r"tableau\s+certified", r"tableau\s+desktop\s+specialist"],
-        'scrum master': [r"scrum\s+master", r"psm\s*i"],
-        'itil': [r"\bitil\b"],
-    }
-    found = set()
-    for label, regs in patterns.items():
-        for r in regs:
-            if re.search(r, t):
-                found.add(label)
-                break
-    return list(found)
+    return [label for label, pattern in _CERTIFICATION_RES.items() if pattern.search(t)]
 
 
 def extract_seniority_level(title: str) -> str:
@@ -149,12 +160,7 @@ def extract_seniority_level(title: str) -> str:
     if not title:
         return 'mid'
     t = title.lower()
-    if re.search(r"\b(principal|distinguished|fellow)\b", t):
-        return 'principal'
-    if re.search(r"\b(lead|chef|head\s+of|manager)\b", t):
-        return 'lead'
-    if re.search(r"\b(senior|confirmé|expert|sr\.?|sen\.?)\b", t):
-        return 'senior'
-    if re.search(r"\b(junior|débutant|jr\.?|graduate)\b", t):
-        return 'junior'
+    for level, pattern in _SENIORITY_RES:
+        if pattern.search(t):
+            return level
     return 'mid'